@@ -11,4 +11,6 @@ __license__ = 'MIT/X'
 __keywords__ = ['petri net']
 __requires__ = ['Trellis >=0.7a2']
 __extras__ = {'pypetri.graph': ['networkx>=1.1'], \
-              'pypetri.graph.viz': ['pygraphviz>=0.99.1'],}
+              'pypetri.graph.viz': ['pygraphviz>=0.99.1'], \
+              'pypetri.collections.matrix': ['numpy'], \
+              'pypetri.montecarlo': ['futures'],}
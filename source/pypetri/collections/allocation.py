@@ -0,0 +1,207 @@
+# @copyright
+# @license
+
+r"""Policies to allocate a flow among the outputs of a flow transition.
+
+A policy is called with the total to allocate, the remaining capacities
+of the outputs (None if unbounded), and the output arcs in the same order.
+It returns the list of counts allocated to each output, which may sum
+to less than the total if the capacities are exhausted.
+"""
+
+from __future__ import absolute_import
+
+from .. import maxflow, net
+
+#############################################################################
+#############################################################################
+
+def greedy(total, capacities, outputs=None):
+    r"""Fills the outputs in order."""
+    counts = []
+    for capacity in capacities:
+        count = total if capacity is None else min(total, capacity)
+        counts.append(count)
+        total -= count
+    return counts
+
+def waterfill(total, capacities, outputs=None):
+    r"""Allocates as evenly as the capacities allow.
+    
+    If the outputs are given, what can't be split evenly goes to
+    the output conditions created first, whatever the order of outputs.
+    """
+    n = len(capacities)
+    counts = [0] * n
+    # smallest capacities first, so that what they can't take is shared
+    if outputs is None:
+        key = lambda i: (capacities[i] is None, capacities[i])
+    else:
+        key = lambda i: (capacities[i] is None, capacities[i], outputs[i].output.created)
+    order = sorted(xrange(n), key=key)
+    for k, i in enumerate(order):
+        if not total:
+            break
+        share = -(-total // (n - k))
+        capacity = capacities[i]
+        count = share if capacity is None else min(share, capacity)
+        counts[i] = count
+        total -= count
+    return counts
+
+def apportion(total, weights, capacities):
+    r"""Allocates in proportion to weights by largest remainders.
+
+    What saturated outputs can't take is apportioned among the rest.
+    """
+    n = len(weights)
+    counts = [0] * n
+    active = [i for i in xrange(n) if weights[i] > 0 and capacities[i] != 0]
+    while total and active:
+        weight = sum([weights[i] for i in active])
+        shares = []
+        for i in active:
+            q, r = divmod(total * weights[i], weight)
+            shares.append([int(q), r, i])
+        left = total - sum([s[0] for s in shares])
+        # sorting is stable, so ties go to earlier outputs
+        for s in sorted(shares, key=lambda s: -s[1])[:left]:
+            s[0] += 1
+        active = []
+        saturated = False
+        for q, r, i in shares:
+            capacity = capacities[i]
+            if capacity is not None and counts[i] + q >= capacity:
+                q = capacity - counts[i]
+                saturated = True
+            else:
+                active.append(i)
+            counts[i] += q
+            total -= q
+        if not saturated:
+            break
+    if total:
+        rooms = [None if c is None else c - k for c, k in zip(capacities, counts)]
+        for i, count in enumerate(greedy(total, rooms)):
+            counts[i] += count
+    return counts
+
+def proportional(total, capacities, outputs=None):
+    r"""Allocates in proportion to the capacities."""
+    weights = [total if c is None else c for c in capacities]
+    return apportion(total, weights, capacities)
+
+def weighted(weight):
+    r"""Returns a policy that allocates in proportion to weight(arc)."""
+    def policy(total, capacities, outputs):
+        return apportion(total, [weight(arc) for arc in outputs], capacities)
+    return policy
+
+def prioritized(priority):
+    r"""Returns a policy that fills outputs in increasing order of priority(arc)."""
+    def policy(total, capacities, outputs):
+        order = sorted(xrange(len(outputs)), key=lambda i: priority(outputs[i]))
+        counts = [0] * len(capacities)
+        for i, count in zip(order, greedy(total, [capacities[i] for i in order])):
+            counts[i] = count
+        return counts
+    return policy
+
+#############################################################################
+#############################################################################
+
+class MaxFlow(object):
+    r"""Prefers outputs by the flow that the network can carry on from them.
+
+    The network is a graph with edge capacities given by the maximum
+    of each condition, in which conditions without outputs are sinks.
+    The throughput from each output condition to the sinks is computed
+    by maximum flow when first needed, and recomputed after refresh.
+    Outputs are first allocated up to their throughput by then,
+    and any remainder is allocated by then up to their capacity.
+    """
+
+    def __init__(self, network=None, conditions=None, transitions=None,
+                 then=proportional):
+        if conditions is None:
+            conditions = network.conditions
+        if transitions is None:
+            transitions = network.transitions
+        self.conditions = tuple(conditions)
+        self.transitions = tuple(transitions)
+        self.then = then
+        self.graph = None
+        self.throughputs = {}
+
+    def refresh(self):
+        r"""Forgets throughputs, after changes to the network."""
+        self.graph = None
+        self.throughputs.clear()
+
+    def build(self):
+        graph = maxflow.Dinic()
+        sink = graph.node()
+        # condition -> (in node, out node)
+        nodes = {}
+        transitions = {}
+        work = list(self.conditions) + list(self.transitions)
+        while work:
+            vertex = work.pop()
+            if vertex in nodes or vertex in transitions:
+                continue
+            if hasattr(vertex, 'marking'):
+                u, v = graph.node(), graph.node()
+                nodes[vertex] = u, v
+                graph.edge(u, v, getattr(vertex, 'maximum', None))
+            else:
+                transitions[vertex] = graph.node()
+            work.extend(net.postset(vertex))
+        for c, (u, v) in nodes.iteritems():
+            outputs = net.postset(c)
+            if not outputs:
+                graph.edge(v, sink)
+            for t in outputs:
+                graph.edge(v, transitions[t])
+        for t, u in transitions.iteritems():
+            for c in net.postset(t):
+                graph.edge(u, nodes[c][0])
+        self.graph = graph, sink, nodes
+
+    def throughput(self, condition):
+        try:
+            return self.throughputs[condition]
+        except KeyError:
+            if self.graph is None:
+                self.build()
+            graph, sink, nodes = self.graph
+            if condition not in nodes:
+                self.conditions += (condition,)
+                self.build()
+                graph, sink, nodes = self.graph
+            graph.reset()
+            throughput = graph.maximize(nodes[condition][1], sink)
+            self.throughputs[condition] = throughput
+            return throughput
+
+    def __call__(self, total, capacities, outputs):
+        useful = []
+        for capacity, arc in zip(capacities, outputs):
+            throughput = self.throughput(arc.output)
+            if throughput == maxflow.INFINITE:
+                throughput = None
+            if capacity is None:
+                useful.append(throughput)
+            elif throughput is None:
+                useful.append(capacity)
+            else:
+                useful.append(min(capacity, throughput))
+        counts = self.then(total, useful, outputs)
+        total -= sum(counts)
+        if total:
+            rooms = [None if c is None else c - k for c, k in zip(capacities, counts)]
+            for i, count in enumerate(self.then(total, rooms, outputs)):
+                counts[i] += count
+        return counts
+
+#############################################################################
+#############################################################################
@@ -41,9 +41,13 @@ class Collection(net.Condition,):
     def send(self):
         return self.update
     
+    def _share(self):
+        r"""Returns the marking, which the caller must not modify."""
+        return self.copy()
+    
     @trellis.modifier
     def pull(self):
-        marking = self.copy()
+        marking = self._share()
         self.clear()
         return marking
 
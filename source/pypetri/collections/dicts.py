@@ -0,0 +1,140 @@
+# @copyright
+# @license
+
+from __future__ import absolute_import
+
+import collections
+
+from .. import trellis
+
+#############################################################################
+#############################################################################
+
+def discard(data, keys):
+    for k in keys:
+        del data[k]
+
+#############################################################################
+#############################################################################
+
+class Dict(trellis.Component, collections.MutableMapping):
+    r"""Mapping with a change log, like sets.Set.
+    
+    The result of copy() is shared until the next change,
+    and must not be modified.
+    """
+
+    changes = trellis.todo(list)
+    to_change = changes.future
+    
+    _shared = None
+    
+    def __init__(self, *args, **kwargs):
+        super(Dict, self).__init__()
+        if args or kwargs:
+            self.update(*args, **kwargs)
+    
+    def __getitem__(self, k):
+        return self._data.__getitem__(k)
+    
+    def __contains__(self, k):
+        return self._data.__contains__(k)
+    
+    def __len__(self):
+        return self._data.__len__()
+
+    def __iter__(self):
+        return self._data.__iter__()
+    
+    def __nonzero__(self):
+        return len(self) > 0
+    
+    def __getstate__(self):
+        return tuple(self._data.iteritems())
+    
+    @trellis.modifier
+    def __setstate__(self, state):
+        self.clear()
+        self.update(state)
+    
+    @trellis.compute
+    def __repr__(self):
+        text = '%s%s' % (self.__class__.__name__, str(self))
+        return lambda: text
+    
+    @trellis.compute
+    def __str__(self):
+        text = repr(dict(self._data))
+        return lambda: text
+    
+    @trellis.maintain(make=dict)
+    def _data(self):
+        data = self._data
+        changes = self.changes
+        if changes:
+            if data is self._shared:
+                # copy on write, or start over if the first change clears
+                data = dict() if changes[0][0] == 'clear' else dict(data)
+            # one undo for all changes
+            actions = []
+            for fn, v in changes:
+                if fn == 'set':
+                    k, x = v
+                    if k in data:
+                        actions.append((data.__setitem__, (k, data[k])))
+                    else:
+                        actions.append((data.pop, (k,)))
+                    data[k] = x
+                elif fn == 'delete':
+                    if v not in data:
+                        raise KeyError(v)
+                    actions.append((data.__setitem__, (v, data.pop(v))))
+                elif fn == 'update':
+                    replaced = dict([(k, data[k]) for k in v if k in data])
+                    added = [k for k in v if k not in data]
+                    data.update(v)
+                    actions.append((data.update, (replaced,)))
+                    actions.append((discard, (data, added)))
+                elif fn == 'clear':
+                    # the cleared dict is restored by undoing this value
+                    if data:
+                        data = {}
+                else:
+                    raise RuntimeError(fn)
+            if actions:
+                trellis.on_undo(trellis.undo_all, actions)
+            trellis.mark_dirty()
+        return data
+    
+    @trellis.modifier
+    def __setitem__(self, k, v):
+        self.to_change.append(('set', (k, v)))
+    
+    @trellis.modifier
+    def __delitem__(self, k):
+        self.to_change.append(('delete', k))
+    
+    @trellis.modifier
+    def update(self, *args, **kwargs):
+        items = dict(*args, **kwargs)
+        if items:
+            self.to_change.append(('update', items))
+    
+    @trellis.modifier
+    def clear(self):
+        self.to_change.append(('clear', None))
+    
+    def copy(self):
+        return dict(self._data)
+    
+    def _share(self):
+        r"""Returns the current items, shared until the next change.
+        
+        The result must not be modified.
+        """
+        data = self._data
+        self._shared = data
+        return data
+
+#############################################################################
+#############################################################################
@@ -3,10 +3,12 @@
 
 from __future__ import absolute_import
 
+import contextlib
 import itertools
 
 from . import trellis
 from .. import net, operators
+from . import allocation, sets
 
 #############################################################################
 #############################################################################
@@ -14,6 +16,10 @@ from .. import net, operators
 def bounded(count, minimum=None, maximum=None):
         return (count is not None) and (minimum is None or count >= minimum)\
           and (maximum is None or count <= maximum)
+
+# rejects any count above the maximum,
+# so Transition.Demultiplexer.prune may cut the search short
+bounded.bounds = True
         
 def decreasing(count, minimum=None, maximum=None, step=-1):
         stop = 0 if minimum is None else minimum
@@ -27,26 +33,115 @@ def increasing(count, minimum=None, maximum=None, step=1):
         for i in xrange(start, stop, step):
             yield i
 
-def roundrobin(total, capacities):
-    for x in capacities:
-        if not total:
-            break
-        capacity = capacities[x]
-        if capacity is None:
-            capacity = total
+#############################################################################
+#############################################################################
+
+class Demand(object):
+    r"""Demand of the output arcs of a transition, in a fixed order.
+    
+    For each arc, lower is what must still be sent and capacity is what
+    may be sent on top of that (None if unbounded).
+    minimum and maximum total the demands of the output conditions.
+    """
+    
+    def __init__(self, outputs, arcs=()):
+        self.outputs = outputs
+        self.arcs = []
+        self.indices = {}
+        self.demands = []
+        self.lower = []
+        self.capacity = []
+        self.minimum = 0
+        self.maximum = 0
+        self.unbounded = 0
+        for arc in arcs:
+            self.append(arc)
+    
+    def append(self, arc, actions=None):
+        if arc.output is None or arc in self.indices or arc not in self.outputs:
+            return
+        self.indices[arc] = len(self.arcs)
+        self.arcs.append(arc)
+        self.demands.append((0, 0))
+        self.lower.append(0)
+        self.capacity.append(0)
+        self.set(len(self.arcs) - 1, arc.output.demand)
+        if actions is not None:
+            actions.append((self.remove, (arc,)))
+    
+    def swap(self, i, j):
+        for values in (self.arcs, self.demands, self.lower, self.capacity):
+            values[i], values[j] = values[j], values[i]
+        self.indices[self.arcs[i]] = i
+        self.indices[self.arcs[j]] = j
+    
+    def remove(self, arc, actions=None):
+        r"""Removes arc in O(1), moving the last arc to its place."""
+        i = self.indices.get(arc)
+        if i is None:
+            return
+        demand = self.demands[i]
+        self.set(i, (0, 0))
+        last = len(self.arcs) - 1
+        if i != last:
+            self.swap(i, last)
+        del self.indices[arc]
+        for values in (self.arcs, self.demands, self.lower, self.capacity):
+            values.pop()
+        if actions is not None:
+            actions.append((self.insert, (i, arc, demand)))
+    
+    def insert(self, i, arc, demand):
+        r"""Undoes remove."""
+        last = len(self.arcs)
+        self.indices[arc] = last
+        self.arcs.append(arc)
+        self.demands.append((0, 0))
+        self.lower.append(0)
+        self.capacity.append(0)
+        if i != last:
+            self.swap(i, last)
+        self.set(i, demand)
+    
+    def set(self, i, demand):
+        minimum, maximum = self.demands[i]
+        self.minimum -= minimum
+        if maximum is None:
+            self.unbounded -= 1
+        else:
+            self.maximum -= maximum
+        self.demands[i] = demand
+        minimum, maximum = demand
+        self.minimum += minimum
+        if maximum is None:
+            self.unbounded += 1
         else:
-            capacity = min(total, capacity)
-        total -= capacity
-        yield x, capacity
+            self.maximum += maximum
+        lower = max(minimum, 0)
+        self.lower[i] = lower
+        self.capacity[i] = None if maximum is None else max(maximum - lower, 0)
+    
+    def update(self, arc, actions):
+        i = self.indices.get(arc)
+        if i is None:
+            return
+        demand = arc.output.demand
+        previous = self.demands[i]
+        if demand != previous:
+            actions.append((self.set, (i, previous)))
+            self.set(i, demand)
 
 #############################################################################
 #############################################################################
 
 class Condition(net.Condition):
 
+    counted = True
+
     marking = trellis.attr(initially=0)
-    minimum = trellis.make(lambda self: None)
-    maximum = trellis.make(lambda self: None)
+    # the bounds may change, and the demand of input transitions follows
+    minimum = trellis.attr(None)
+    maximum = trellis.attr(None)
     
     @trellis.maintain
     def bounded(self):
@@ -57,6 +152,31 @@ class Condition(net.Condition):
         if not bounded(marking, minimum=minimum, maximum=maximum):
             raise ValueError(marking)
         return marking
+    
+    @trellis.compute
+    def demand(self):
+        r"""(minimum, maximum) still to be sent here."""
+        marking = self.marking
+        minimum = self.minimum
+        if minimum:
+            minimum -= marking
+        else:
+            minimum = 0
+        maximum = self.maximum
+        if maximum:
+            maximum -= marking
+        return minimum, maximum
+    
+    @trellis.maintain(initially=None)
+    def notified(self):
+        # tell the demultiplexers of input transitions which arc changed
+        demand = self.demand
+        if demand != self.notified:
+            for arc in self.inputs:
+                demux = getattr(arc.input, 'demux', None)
+                if isinstance(demux, Transition.Demultiplexer):
+                    demux.notify(arc)
+        return demand
 
     @trellis.modifier
     def send(self, count):
@@ -90,92 +210,126 @@ class Transition(net.Transition):
     @classmethod
     def Pipe(cls):
         return operators.FilterOut(fn=cls.aggregate)
+    
+    @trellis.maintain
+    def pruning(self):
+        # Let the multiplexer skip combinations the demultiplexer would reject
+        mux = self.mux
+        prune = getattr(self.demux, 'prune', None)
+        if hasattr(mux, 'prune') and mux.prune is not prune:
+            mux.prune = prune
+        return prune
 
     class Demultiplexer(operators.Demultiplexer):
     
         predicate = trellis.attr(bounded)
+        
+        # allocates what remains after the minimums are met,
+        # evenly and independently of the order of the outputs
+        assigner = trellis.attr(allocation.waterfill)
+        
+        # output arcs whose demand changed
+        updated = trellis.todo(list)
+        to_update = updated.future
+        
+        @trellis.maintain(initially=None)
+        def demand(self):
+            # O(changes), unless the outputs are replaced or cleared
+            outputs = self.outputs
+            demand = self.demand
+            actions = []
+            if demand is None or demand.outputs is not outputs or outputs is None:
+                demand = Demand(outputs, outputs or ())
+            elif outputs.changes:
+                changed = sets.delta(outputs.changes)
+                if changed is None:
+                    demand = Demand(outputs, outputs)
+                else:
+                    added, removed = changed
+                    for arc in removed:
+                        demand.remove(arc, actions)
+                    for arc in added:
+                        demand.append(arc, actions)
+            for arc in self.updated:
+                demand.update(arc, actions)
+            if actions:
+                trellis.on_undo(trellis.undo_all, actions)
+                trellis.mark_dirty()
+            return demand
+        
+        @trellis.modifier
+        def notify(self, arc):
+            r"""Called when the demand of the output of arc changes."""
+            self.to_update.append(arc)
 
         @trellis.compute
-        def minimum(self): # TODO: optimize?
-            outputs = self.outputs
-            if not outputs:
+        def minimum(self):
+            if not self.outputs:
                 return None
-            demand = 0
-            for output in outputs:
-                output = output.output
-                if output is None:
-                    continue
-                minimum = output.minimum
-                if minimum:
-                    if output.marking:
-                        minimum -= output.marking
-                    demand += minimum
-            return demand
+            return self.demand.minimum
         
         @trellis.compute
-        def maximum(self): # TODO: optimize?
-            outputs = self.outputs
-            if not outputs:
+        def maximum(self):
+            if not self.outputs:
                 return None
-            demand = 0
-            for output in outputs:
-                output = output.output
-                if output is None:
-                    continue
-                maximum = output.maximum
-                if maximum is None:
-                    return None
-                if maximum:
-                    if output.marking:
-                        maximum -= output.marking
-                    demand += maximum
-            return demand
+            demand = self.demand
+            if demand.unbounded:
+                return None
+            return demand.maximum
+    
+        @trellis.compute
+        def prune(self):
+            # Flows are non-negative, so a partial inflow that exceeds
+            # the maximum is rejected by a predicate that declares
+            # itself bounded; other predicates get the full search
+            maximum = self.maximum
+            if maximum is None or not getattr(self.predicate, 'bounds', False):
+                return None
+            def prune(flows):
+                return sum([flow.args[0] for flow in flows]) > maximum
+            return prune
     
         def next(self, *args, **kwargs):
             predicate = self.predicate
             minimum = self.minimum
             maximum = self.maximum
-            for flows in super(Transition.Demultiplexer, self).next(*args, **kwargs):
+            inputs = super(Transition.Demultiplexer, self).next(*args, **kwargs)
+            if inputs is None:
+                # not linked to an input yet
+                return
+            for flows in inputs:
                 inflow = sum([flow.args[0] for flow in flows])
                 if predicate(inflow, minimum, maximum):
                     yield flows
     
         @trellis.modifier
-        def send(self, total, assigner=roundrobin, outputs=iter):
-            outputs = [x for x in outputs(self.outputs) if x.output is not None]
-            
-            assigned = {}
+        def send(self, total, assigner=None):
+            demand = self.demand
+            outputs = demand.arcs
             
             # meet the minimums
-            for x in outputs:
-                minimum = x.output.minimum
-                count = 0
-                if minimum:
-                    count = minimum
-                if count > total:
-                    raise ValueError(total)
-                total -= count
-                assigned[x] = count
+            assigned = list(demand.lower)
+            total -= sum(assigned)
+            if total < 0:
+                raise ValueError(total)
     
             # some policy to allocate the remainder
-            capacities = {}
-            for x in assigned:
-                maximum = x.output.maximum
-                capacity = maximum
-                if capacity is not None:
-                    capacity -= assigned[x]
-                capacities[x] = capacity
-            for x, count in assigner(total, capacities):
-                assert count <= total
-                total -= count
-                assigned[x] += count
+            if total:
+                if assigner is None:
+                    assigner = self.assigner
+                counts = assigner(total, demand.capacity, outputs)
+                for i, count in enumerate(counts):
+                    if count:
+                        total -= count
+                        assigned[i] += count
             
             if total != 0:
                 raise ValueError(total)
             
             # finally, send
-            for x, count in assigned.iteritems():
-                x.send(count)
+            for x, count in zip(outputs, assigned):
+                if count:
+                    x.send(count)
 
 #############################################################################
 #############################################################################
@@ -187,6 +341,40 @@ class FlowNetwork(net.Network):
 
     def Transition(self, Transition=Transition, *args, **kwargs):
         return super(FlowNetwork, self).Transition(Transition, *args, **kwargs)
+    
+    def compile(self, *args, **kwargs):
+        r"""Returns a matrix.Incidence simulator of this network (requires numpy)."""
+        from . import matrix
+        return matrix.compile(self, *args, **kwargs)
+    
+    @contextlib.contextmanager
+    def raw(self, *args, **kwargs):
+        r"""Yields a compiled simulator, and syncs the conditions on exit.
+        
+        For batch simulations that never roll back.  In the block,
+        the simulator changes its own markings directly, without
+        transactions, rules or undo, and the conditions keep their
+        markings from entry.  On exit, the conditions are set to the
+        simulated markings in one transaction, unless the block failed.
+        Changes made to the conditions in the block are overwritten.
+        """
+        compiled = self.compile(*args, **kwargs)
+        yield compiled
+        compiled.sync()
+    
+    # toname -> graph.net.NetworkGraph, reused by capacity()
+    _graphed = None
+    
+    def capacity(self, toname=id, **kwargs):
+        r"""Returns a graph.capacity.Capacity analysis of this network (requires networkx)."""
+        from ..graph import capacity, net as graphnet
+        graphs = self._graphed
+        if graphs is None:
+            graphs = self._graphed = {}
+        graphed = graphs.get(toname)
+        if graphed is None:
+            graphed = graphs[toname] = graphnet.NetworkGraph(self, toname)
+        return capacity.Capacity(graphed, **kwargs)
 
 #############################################################################
 #############################################################################
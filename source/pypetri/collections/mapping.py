@@ -7,14 +7,14 @@ import collections
 
 from .. import trellis
 
-from . import collection
+from . import collection, dicts
 
 #############################################################################
 #############################################################################
 
 class Mapping(collection.Collection, collections.MutableMapping,):
 
-    marking = trellis.make(trellis.Dict)
+    marking = trellis.make(dicts.Dict)
 
     @trellis.compute
     def __getitem__(self,):
@@ -29,18 +29,30 @@ class Mapping(collection.Collection, collections.MutableMapping,):
         return self.marking.__setitem__
         
     def copy(self):
-        return dict(self.marking)
+        return self.marking.copy()
+    
+    def _share(self):
+        return self.marking._share()
+    
+    def snapshot(self):
+        return frozenset(self.marking.iteritems())
+    
+    @trellis.modifier
+    def restore(self, snapshot):
+        marking = self.marking
+        snapshot = dict(snapshot)
+        for k in [k for k in marking if k not in snapshot]:
+            del marking[k]
+        for k, v in snapshot.iteritems():
+            if k not in marking or marking[k] != v:
+                marking[k] = v
     
     @trellis.modifier
     def update(self, arg):
-        add = self.__setitem__
         if isinstance(arg, tuple) and len(arg) == 2:
-            add(*arg)
+            self.__setitem__(*arg)
             return
-        if isinstance(arg, collections.Mapping):
-            arg = arg.iteritems()
-        for item in arg:
-            add(*item)
+        self.marking.update(arg)
                 
     @trellis.modifier
     def pull(self, arg=None):
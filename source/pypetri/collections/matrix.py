@@ -0,0 +1,151 @@
+# @copyright
+# @license
+
+r"""Incidence matrix simulation of flow networks.
+
+Requires numpy
+
+A compiled network fires transitions with fixed weights:
+each firing pulls weight(arc) from every input condition and
+sends weight(arc) to every output condition.
+The allocation policies of flow.Transition are not modelled.
+"""
+
+from __future__ import absolute_import
+
+import numpy
+
+from .. import trellis
+
+#############################################################################
+#############################################################################
+
+def weight(arc):
+    return 1
+
+#############################################################################
+#############################################################################
+
+class Incidence(object):
+    r"""Pre and post incidence matrices (transitions x conditions)."""
+
+    dtype = numpy.int64
+
+    def __init__(self, conditions, transitions, weight=weight):
+        self.conditions = tuple(conditions)
+        self.transitions = tuple(transitions)
+        indices = dict([(c, i) for i, c in enumerate(self.conditions)])
+        shape = (len(self.transitions), len(self.conditions))
+        pre = numpy.zeros(shape, dtype=self.dtype)
+        post = numpy.zeros(shape, dtype=self.dtype)
+        for i, t in enumerate(self.transitions):
+            for arc in t.inputs:
+                if arc.input in indices:
+                    pre[i, indices[arc.input]] += weight(arc)
+            for arc in t.outputs:
+                if arc.output in indices:
+                    post[i, indices[arc.output]] += weight(arc)
+        self.pre = pre
+        self.post = post
+        self.change = post - pre
+        limits = numpy.iinfo(self.dtype)
+        self.minimum = numpy.array([limits.min if c.minimum is None else c.minimum
+                                    for c in self.conditions], dtype=self.dtype)
+        self.maximum = numpy.array([limits.max if c.maximum is None else c.maximum
+                                    for c in self.conditions], dtype=self.dtype)
+        self.marking = numpy.zeros(len(self.conditions), dtype=self.dtype)
+        self._touches = (pre != 0) | (post != 0)
+        self._affects = {}
+        self.load()
+
+    def load(self):
+        r"""Reads the current markings of the conditions."""
+        self.marking[:] = [c.marking for c in self.conditions]
+        return self.marking
+
+    @trellis.modifier
+    def sync(self):
+        r"""Writes the compiled markings back to the conditions."""
+        for c, marking in zip(self.conditions, self.marking.tolist()):
+            if c.marking != marking:
+                c.marking = marking
+
+    def enabled(self, marking=None, rows=None):
+        r"""Boolean vector of the transitions that may fire in marking."""
+        if marking is None:
+            marking = self.marking
+        pre = self.pre
+        change = self.change
+        if rows is not None:
+            pre = pre[rows]
+            change = change[rows]
+        after = marking + change
+        return (marking >= pre).all(1) \
+            & (after >= self.minimum).all(1) \
+            & (after <= self.maximum).all(1)
+
+    def affects(self, transition):
+        r"""Indices of transitions whose enabling may change when transition fires."""
+        try:
+            return self._affects[transition]
+        except KeyError:
+            changed = self.change[transition] != 0
+            rows = numpy.flatnonzero(self._touches[:, changed].any(1))
+            self._affects[transition] = rows
+            return rows
+
+    def fire(self, transition, marking=None):
+        if marking is None:
+            marking = self.marking
+        if not self.enabled(marking, [transition])[0]:
+            raise ValueError(transition)
+        marking += self.change[transition]
+        return marking
+
+    def run(self, steps, choose=None, marking=None):
+        r"""Fires up to steps transitions, or until none are enabled.
+
+        choose picks one index from a vector of enabled transitions,
+        defaulting to the first.
+        Returns the number of times each transition fired.
+        """
+        if marking is None:
+            marking = self.marking
+        change = self.change
+        fired = numpy.zeros(len(self.transitions), dtype=self.dtype)
+        enabled = self.enabled(marking)
+        for step in xrange(steps):
+            candidates = numpy.flatnonzero(enabled)
+            if not len(candidates):
+                break
+            if choose is None:
+                t = candidates[0]
+            else:
+                t = choose(candidates)
+            marking += change[t]
+            fired[t] += 1
+            # only re-check transitions that share a changed condition
+            rows = self.affects(t)
+            enabled[rows] = self.enabled(marking, rows)
+        return fired
+
+#############################################################################
+#############################################################################
+
+def compile(network, weight=weight, conditions=None, transitions=None):
+    if transitions is None:
+        transitions = network.transitions
+    transitions = tuple(transitions)
+    if conditions is None:
+        conditions = list(network.conditions)
+        # include conditions of subnetworks that the transitions touch
+        included = set(conditions)
+        for t in transitions:
+            for c in [arc.input for arc in t.inputs] + [arc.output for arc in t.outputs]:
+                if c is not None and c not in included:
+                    included.add(c)
+                    conditions.append(c)
+    return Incidence(conditions, transitions, weight)
+
+#############################################################################
+#############################################################################
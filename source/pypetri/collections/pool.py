@@ -25,29 +25,41 @@ class Pool(collection.Collection, collections.MutableSet,):
         return self.marking.discard
     
     def copy(self):
-        return set(self.marking)
+        return self.marking.copy()
+    
+    def _share(self):
+        return self.marking._share()
+    
+    def snapshot(self):
+        return frozenset(self.marking)
+    
+    @trellis.modifier
+    def restore(self, snapshot):
+        marking = self.marking
+        marking.difference_update([i for i in marking if i not in snapshot])
+        marking.update([i for i in snapshot if i not in marking])
 
     @trellis.modifier
     def update(self, *args):
-        add = self.add
         # won't work for all contained types
         if len(args) == 1:
             if not isinstance(args[0], collections.Hashable):
                 args = args[0]
-        for arg in args:
-            add(arg)
+        self.marking.update(args)
 
     @trellis.modifier
     def pull(self, arg=None):
         marking = self.marking
         if arg is None or arg is marking:
             return super(Pool, self).pull()
-        pop = self.remove
         if isinstance(arg, collections.Hashable) and arg in marking:
-            pop(arg)
+            self.remove(arg)
             return arg
-        for i in arg:
-            pop(i)
+        items = frozenset(arg)
+        for i in items:
+            if i not in marking:
+                raise KeyError(i)
+        marking.difference_update(items)
         return arg
 
 #############################################################################
@@ -4,12 +4,172 @@
 from __future__ import absolute_import
 
 import collections
+import itertools
 
 from .. import trellis
 
 #############################################################################
 #############################################################################
 
+def pop(data, n):
+    for i in xrange(n):
+        data.pop()
+
+def popleft(data, n):
+    for i in xrange(n):
+        data.popleft()
+
+def extend(data, items):
+    r"""Extends data, returning the undo actions."""
+    n = len(data)
+    k = len(items)
+    maxlen = data.maxlen
+    if maxlen is None or n + k <= maxlen:
+        data.extend(items)
+        return [(pop, (data, k))]
+    # items that fall off the left
+    dropped = tuple(itertools.islice(data, 0, min(n, n + k - maxlen)))
+    data.extend(items)
+    return [(data.extendleft, (reversed(dropped),)),
+            (pop, (data, min(k, maxlen)))]
+
+def extendleft(data, items):
+    r"""Extends the left of data, returning the undo actions."""
+    n = len(data)
+    k = len(items)
+    maxlen = data.maxlen
+    if maxlen is None or n + k <= maxlen:
+        data.extendleft(items)
+        return [(popleft, (data, k))]
+    # items that fall off the right
+    dropped = tuple(itertools.islice(data, max(0, maxlen - k), n))
+    data.extendleft(items)
+    return [(data.extend, (dropped,)),
+            (popleft, (data, min(k, maxlen)))]
+
+#############################################################################
+#############################################################################
+
+class RingBuffer(object):
+    r"""Bounded deque in preallocated slots.
+    
+    Unlike a deque, indexing takes constant time.
+    """
+
+    __slots__ = ('maxlen', '_slots', '_head', '_size',)
+    
+    def __init__(self, iterable=(), maxlen=None):
+        if maxlen is None or maxlen < 0:
+            raise ValueError(maxlen)
+        self.maxlen = maxlen
+        self._slots = [None] * maxlen
+        self._head = 0
+        self._size = 0
+        self.extend(iterable)
+    
+    def __len__(self):
+        return self._size
+    
+    def __iter__(self):
+        slots = self._slots
+        head = self._head
+        maxlen = self.maxlen
+        for i in xrange(self._size):
+            yield slots[(head + i) % maxlen]
+    
+    def __reversed__(self):
+        slots = self._slots
+        head = self._head
+        maxlen = self.maxlen
+        for i in xrange(self._size - 1, -1, -1):
+            yield slots[(head + i) % maxlen]
+    
+    def __getitem__(self, i):
+        size = self._size
+        if i < 0:
+            i += size
+        if not 0 <= i < size:
+            raise IndexError(i)
+        return self._slots[(self._head + i) % self.maxlen]
+    
+    def __repr__(self):
+        return '%s(%r, maxlen=%d)' % (self.__class__.__name__, list(self), self.maxlen)
+    
+    def append(self, item):
+        maxlen = self.maxlen
+        if not maxlen:
+            return
+        if self._size == maxlen:
+            # overwrite the head
+            self._slots[self._head] = item
+            self._head = (self._head + 1) % maxlen
+        else:
+            self._slots[(self._head + self._size) % maxlen] = item
+            self._size += 1
+    
+    def appendleft(self, item):
+        maxlen = self.maxlen
+        if not maxlen:
+            return
+        # when full, this overwrites the tail
+        self._head = (self._head - 1) % maxlen
+        self._slots[self._head] = item
+        if self._size < maxlen:
+            self._size += 1
+    
+    def pop(self):
+        if not self._size:
+            raise IndexError('pop from an empty ring buffer')
+        self._size -= 1
+        i = (self._head + self._size) % self.maxlen
+        item = self._slots[i]
+        self._slots[i] = None
+        return item
+    
+    def popleft(self):
+        if not self._size:
+            raise IndexError('pop from an empty ring buffer')
+        i = self._head
+        item = self._slots[i]
+        self._slots[i] = None
+        self._head = (i + 1) % self.maxlen
+        self._size -= 1
+        return item
+    
+    def extend(self, items):
+        append = self.append
+        for item in items:
+            append(item)
+    
+    def extendleft(self, items):
+        appendleft = self.appendleft
+        for item in items:
+            appendleft(item)
+    
+    def rotate(self, n=1):
+        size = self._size
+        if size < 2:
+            return
+        n %= size
+        if not n:
+            return
+        if size == self.maxlen:
+            self._head = (self._head - n) % size
+        elif n <= size // 2:
+            for i in xrange(n):
+                self.appendleft(self.pop())
+        else:
+            for i in xrange(size - n):
+                self.append(self.popleft())
+    
+    def clear(self):
+        self._slots = [None] * self.maxlen
+        self._head = 0
+        self._size = 0
+
+#############################################################################
+#############################################################################
+
 class Queue(trellis.Component, collections.Sequence):
 
     maxlen = trellis.attr(None)
@@ -67,25 +227,30 @@ class Queue(trellis.Component, collections.Sequence):
         data = self._data
         changes = self.changes
         if changes:
+            # one undo for all changes
+            actions = []
             for fn, args in changes:
-                if fn == 'append':
-                    data.append(args[0])
-                    trellis.on_undo(data.pop)
-                elif fn == 'appendleft':
-                    data.appendleft(args[0])
-                    trellis.on_undo(data.popleft)
+                if fn == 'append' or fn == 'extend':
+                    actions.extend(extend(data, args))
+                elif fn == 'appendleft' or fn == 'extendleft':
+                    actions.extend(extendleft(data, args))
                 elif fn == 'pop':
-                    v = data.pop()
-                    trellis.on_undo(data.append, v)
+                    v = [data.pop() for i in xrange(args[0])]
+                    actions.append((data.extend, (reversed(v),)))
                 elif fn == 'popleft':
-                    v = data.popleft()
-                    trellis.on_undo(data.appendleft, v)
+                    v = [data.popleft() for i in xrange(args[0])]
+                    actions.append((data.extendleft, (reversed(v),)))
+                elif fn == 'rotate':
+                    data.rotate(args[0])
+                    actions.append((data.rotate, (-args[0],)))
                 elif fn == 'clear':
-                    v = data.copy()
-                    data.clear()
-                    trellis.on_undo(data.extend, v)
+                    # the cleared data is restored by undoing this value
+                    if data:
+                        data = self.Queue()
                 else:
                     raise RuntimeError(fn)
+            if actions:
+                trellis.on_undo(trellis.undo_all, actions)
             trellis.mark_dirty()
         return data
 
@@ -95,15 +260,33 @@ class Queue(trellis.Component, collections.Sequence):
     def appendleft(self, item):
         self._change('appendleft', item)
         
-    def pop(self):
-        self._change('pop')
+    def pop(self, n=1):
+        if n:
+            self._change('pop', n)
         
-    def popleft(self):
-        self._change('popleft')
+    def popleft(self, n=1):
+        if n:
+            self._change('popleft', n)
+    
+    def rotate(self, n=1):
+        if n:
+            self._change('rotate', n)
     
     def clear(self):
         self._change('clear')
     
+    @trellis.modifier
+    def extend(self, items):
+        items = tuple(items)
+        if items:
+            self.to_change.append(('extend', items))
+    
+    @trellis.modifier
+    def extendleft(self, items):
+        items = tuple(items)
+        if items:
+            self.to_change.append(('extendleft', items))
+    
     @trellis.compute
     def enqueue(self):
         return self.append
@@ -121,11 +304,15 @@ class Queue(trellis.Component, collections.Sequence):
     def tail(self):
         if self:
             return self[-1]
-        
-    @trellis.modifier
-    def extend(self, items):
-        for item in items:
-            self.append(item)
-        
+
+#############################################################################
+#############################################################################
+
+class RingQueue(Queue):
+    r"""Queue backed by a RingBuffer, which requires a maxlen."""
+    
+    def Queue(self):
+        return RingBuffer(maxlen=self.maxlen)
+
 #############################################################################
 #############################################################################
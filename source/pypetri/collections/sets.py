@@ -10,11 +10,38 @@ from .. import trellis
 #############################################################################
 #############################################################################
 
+def delta(changes):
+    r"""Returns the (added, removed) items of changes,
+    or None if they include a clear."""
+    added = set()
+    removed = set()
+    for fn, v in changes:
+        if fn == 'add':
+            v = (v,)
+            fn = 'update'
+        elif fn == 'discard':
+            v = (v,)
+            fn = 'difference_update'
+        if fn == 'update':
+            added.update(v)
+            removed.difference_update(v)
+        elif fn == 'difference_update':
+            removed.update(v)
+            added.difference_update(v)
+        else:
+            return None
+    return added, removed
+
+#############################################################################
+#############################################################################
+
 class Set(trellis.Component, collections.MutableSet):
 
     changes = trellis.todo(list)
     to_change = changes.future
     
+    _shared = None
+    
     def __init__(self, iterable=None):
         super(Set, self).__init__()
         if iterable:
@@ -55,18 +82,39 @@ class Set(trellis.Component, collections.MutableSet):
         data = self._data
         changes = self.changes
         if changes:
+            if data is self._shared:
+                # copy on write, or start over if the first change clears
+                data = set() if changes[0][0] == 'clear' else set(data)
+            # one undo for all changes
+            actions = []
             for fn, v in changes:
                 if fn == 'add':
                     if v not in data:
                         data.add(v)
-                        trellis.on_undo(data.discard, v)
+                        actions.append((data.discard, (v,)))
                 elif fn == 'discard':
                     if v not in data:
                         raise ValueError(v)
                     data.discard(v)
-                    trellis.on_undo(data.add, v)
+                    actions.append((data.add, (v,)))
+                elif fn == 'update':
+                    added = v.difference(data)
+                    if added:
+                        data.update(added)
+                        actions.append((data.difference_update, (added,)))
+                elif fn == 'difference_update':
+                    removed = data.intersection(v)
+                    if removed:
+                        data.difference_update(removed)
+                        actions.append((data.update, (removed,)))
+                elif fn == 'clear':
+                    # the cleared set is restored by undoing this value
+                    if data:
+                        data = set()
                 else:
                     raise RuntimeError(fn)
+            if actions:
+                trellis.on_undo(trellis.undo_all, actions)
             trellis.mark_dirty()
         return data
     
@@ -80,8 +128,31 @@ class Set(trellis.Component, collections.MutableSet):
         
     @trellis.modifier
     def update(self, items):
-        for item in items:
-            self.add(item)
+        items = frozenset(items)
+        if items:
+            self.to_change.append(('update', items))
+    
+    @trellis.modifier
+    def difference_update(self, items):
+        items = frozenset(items)
+        if items:
+            self.to_change.append(('difference_update', items))
+    
+    @trellis.modifier
+    def clear(self):
+        self.to_change.append(('clear', None))
+    
+    def copy(self):
+        return set(self._data)
+    
+    def _share(self):
+        r"""Returns the current items, shared until the next change.
+        
+        The result must not be modified.
+        """
+        data = self._data
+        self._shared = data
+        return data
         
 #############################################################################
 #############################################################################
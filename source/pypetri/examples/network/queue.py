@@ -40,12 +40,18 @@ class Queue(collection.Collection):
     
     @trellis.modifier
     def send(self, *args):
-        for arg in args:
-            self.enqueue(arg)
+        self.marking.extend(args)
     
     def next(self):
         if len(self):
             yield self.Event(self.pull, self.head)
+    
+    def snapshot(self):
+        return self.marking.__getstate__()
+    
+    @trellis.modifier
+    def restore(self, snapshot):
+        self.marking.__setstate__(snapshot)
 
 #############################################################################
 #############################################################################
@@ -0,0 +1,125 @@
+# @copyright
+# @license
+
+r"""Maximum flow analysis of flow networks.
+
+The graph of a network is converted to a capacitated flow graph.
+Each condition is split into an edge whose capacity is the maximum
+of the condition, while arcs and transitions are unbounded.
+Flow enters at the source conditions and leaves at the sink conditions,
+which default to the conditions without inputs and without outputs.
+"""
+
+import collections
+
+from .. import maxflow
+
+#############################################################################
+#############################################################################
+
+class Capacity(object):
+    r"""Takes a net.NetworkGraph of a flow network."""
+
+    def __init__(self, graphed, sources=None, sinks=None):
+        self.graphed = graphed
+        g = graphed.graph.graph
+        vertices = graphed.vertices
+        toname = graphed.toname
+        self.conditions = []
+        self.transitions = []
+        # condition -> (minimum, maximum)
+        self.bounds = {}
+        for name, data in g.nodes_iter(data=True):
+            if data.get('role') == 'condition':
+                vertex = vertices[name]
+                self.conditions.append(name)
+                self.bounds[name] = (getattr(vertex, 'minimum', None) or 0,
+                                     getattr(vertex, 'maximum', None))
+            else:
+                self.transitions.append(name)
+        self.arcs = list(g.edges_iter())
+        if sources is None:
+            sources = [n for n in self.conditions if not g.in_degree(n)]
+        else:
+            sources = [toname(v) for v in sources]
+        if sinks is None:
+            sinks = [n for n in self.conditions if not g.out_degree(n)]
+        else:
+            sinks = [toname(v) for v in sinks]
+        self.sources = tuple(sources)
+        self.sinks = tuple(sinks)
+        self.flow = None
+
+    def build(self, reduced=False):
+        r"""Returns (graph, nodes, edges, excess).
+
+        graph has source 0 and sink 1, nodes maps names to (in, out) nodes,
+        and edges maps conditions to their edges.
+        If reduced, the minimums are subtracted from the capacities
+        and recorded as excess flow into and out of nodes.
+        """
+        graph = maxflow.Dinic(2)
+        nodes = {}
+        edges = {}
+        excess = collections.defaultdict(int)
+        for name in self.conditions:
+            minimum, maximum = self.bounds[name]
+            u, v = graph.node(), graph.node()
+            nodes[name] = u, v
+            capacity = maximum
+            if reduced and minimum:
+                if maximum is not None:
+                    capacity = max(maximum - minimum, 0)
+                excess[v] += minimum
+                excess[u] -= minimum
+            edges[name] = graph.edge(u, v, capacity)
+        for name in self.transitions:
+            n = graph.node()
+            nodes[name] = n, n
+        for a, b in self.arcs:
+            graph.edge(nodes[a][1], nodes[b][0])
+        for name in self.sources:
+            graph.edge(0, nodes[name][0])
+        for name in self.sinks:
+            graph.edge(nodes[name][1], 1)
+        return graph, nodes, edges, excess
+
+    def throughput(self):
+        r"""Maximum flow from the sources to the sinks (may be infinite)."""
+        if self.flow is None:
+            graph, nodes, edges, excess = self.build()
+            value = graph.maximize(0, 1)
+            self.flow = value, graph, edges
+        return self.flow[0]
+
+    def bottleneck(self):
+        r"""Conditions of a minimum cut, or [] if the throughput is infinite."""
+        value = self.throughput()
+        if value == maxflow.INFINITE:
+            return []
+        value, graph, edges = self.flow
+        cut = set(graph.cut(0))
+        vertices = self.graphed.vertices
+        return [vertices[name] for name in self.conditions if edges[name] in cut]
+
+    def feasible(self):
+        r"""True if a circulation through the sources and sinks meets
+        every minimum without exceeding any maximum."""
+        for minimum, maximum in self.bounds.itervalues():
+            if maximum is not None and minimum > maximum:
+                return False
+        graph, nodes, edges, excess = self.build(True)
+        # return flow from the sinks to the sources
+        graph.edge(1, 0)
+        source, sink = graph.node(), graph.node()
+        required = 0
+        for n, x in excess.iteritems():
+            if x > 0:
+                graph.edge(source, n, x)
+                required += x
+            elif x < 0:
+                graph.edge(n, sink, -x)
+        return graph.maximize(source, sink) == required
+
+#############################################################################
+#############################################################################
@@ -0,0 +1,438 @@
+# @copyright
+# @license
+
+r"""Array-based directed multigraph with integer vertex ids.
+
+A drop-in backend for graph.Graph where networkx's dict-of-dicts
+costs too much memory.  Nodes are non-negative integers,
+and edges are integers indexing parallel arrays of tails, heads,
+keys, and the next edges out of the tail and into the head
+(linked adjacency lists, or "forward stars").
+Attribute dicts are only stored for nodes and edges that have them.
+Edge keys must be integers, such as the ids used by net.NetworkGraph.
+"""
+
+from __future__ import absolute_import
+
+import array
+import itertools
+
+import networkx as nx
+
+#############################################################################
+#############################################################################
+
+class Numbering(object):
+    r"""Assigns successive integer ids to objects, for use as a toname."""
+
+    def __init__(self):
+        self.ids = {}
+
+    def __call__(self, obj):
+        ids = self.ids
+        try:
+            return ids[obj]
+        except KeyError:
+            id = ids[obj] = len(ids)
+            return id
+
+#############################################################################
+#############################################################################
+
+class Nodes(object):
+    r"""Node attribute dicts, like networkx's Graph.node."""
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, u):
+        graph = self.graph
+        if not graph.has_node(u):
+            raise KeyError(u)
+        return graph._node_data.setdefault(u, {})
+
+    def __contains__(self, u):
+        return self.graph.has_node(u)
+
+    def __iter__(self):
+        return self.graph.nodes_iter()
+
+    def __len__(self):
+        return self.graph.order()
+
+class MultiDiGraph(object):
+
+    NONE = -1
+
+    def __init__(self, **attr):
+        self.graph = dict(attr)
+        self._reset()
+
+    def _reset(self):
+        # per node
+        self._alive = bytearray()
+        self._first_out = array.array('l')
+        self._first_in = array.array('l')
+        self._node_data = {}
+        self._order = 0
+        # per edge
+        self._tails = array.array('l')
+        self._heads = array.array('l')
+        self._keys = array.array('l')
+        self._next_out = array.array('l')
+        self._next_in = array.array('l')
+        self._edge_data = {}
+        self._free = array.array('l')
+        self._size = 0
+
+    def _get_name(self):
+        return self.graph.get('name', '')
+
+    def _set_name(self, name):
+        self.graph['name'] = name
+
+    name = property(_get_name, _set_name)
+
+    @property
+    def node(self):
+        return Nodes(self)
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, self.name)
+
+    def is_directed(self):
+        return True
+
+    def is_multigraph(self):
+        return True
+
+    #########################################################################
+
+    def has_node(self, u):
+        try:
+            return u >= 0 and bool(self._alive[u])
+        except (IndexError, TypeError):
+            return False
+
+    __contains__ = has_node
+
+    def __iter__(self):
+        return self.nodes_iter()
+
+    def __len__(self):
+        return self._order
+
+    def order(self):
+        return self._order
+
+    number_of_nodes = order
+
+    def add_node(self, u, attr_dict=None, **attr):
+        if not isinstance(u, (int, long)):
+            raise TypeError(u)
+        if u < 0:
+            raise ValueError(u)
+        alive = self._alive
+        n = len(alive)
+        if u >= n:
+            extra = u + 1 - n
+            alive.extend(bytearray(extra))
+            self._first_out.extend(array.array('l', [self.NONE]) * extra)
+            self._first_in.extend(array.array('l', [self.NONE]) * extra)
+        if not alive[u]:
+            alive[u] = 1
+            self._order += 1
+        if attr_dict:
+            attr = dict(attr_dict, **attr)
+        if attr:
+            self._node_data.setdefault(u, {}).update(attr)
+
+    def add_nodes_from(self, nodes, **attr):
+        for n in nodes:
+            if isinstance(n, tuple):
+                n, data = n
+                self.add_node(n, data, **attr)
+            else:
+                self.add_node(n, **attr)
+
+    def remove_node(self, u):
+        if not self.has_node(u):
+            raise nx.NetworkXError("The node %s is not in the graph." % (u,))
+        # one pass over the list of each neighbor, rather than one per edge
+        outs = list(self._out(u))
+        ins = list(self._in(u))
+        edges = set(outs)
+        edges.update(ins)
+        heads = set([self._heads[e] for e in outs])
+        tails = set([self._tails[e] for e in ins])
+        heads.discard(u)
+        tails.discard(u)
+        for v in heads:
+            self._filter(self._first_in, self._next_in, v, edges)
+        for w in tails:
+            self._filter(self._first_out, self._next_out, w, edges)
+        self._first_out[u] = self.NONE
+        self._first_in[u] = self.NONE
+        for e in edges:
+            self._release(e)
+        self._alive[u] = 0
+        self._node_data.pop(u, None)
+        self._order -= 1
+
+    def remove_nodes_from(self, nodes):
+        for n in nodes:
+            if self.has_node(n):
+                self.remove_node(n)
+
+    def nodes_iter(self, data=False):
+        alive = self._alive
+        nodes = itertools.compress(xrange(len(alive)), alive)
+        if not data:
+            return nodes
+        node_data = self._node_data
+        return ((u, node_data.get(u, {})) for u in nodes)
+
+    def nodes(self, data=False):
+        return list(self.nodes_iter(data))
+
+    #########################################################################
+
+    def _out(self, u):
+        e = self._first_out[u]
+        next = self._next_out
+        while e >= 0:
+            yield e
+            e = next[e]
+
+    def _in(self, u):
+        e = self._first_in[u]
+        next = self._next_in
+        while e >= 0:
+            yield e
+            e = next[e]
+
+    def _find(self, u, v, key=None):
+        if not self.has_node(u):
+            return self.NONE
+        heads = self._heads
+        keys = self._keys
+        for e in self._out(u):
+            if heads[e] == v and (key is None or keys[e] == key):
+                return e
+        return self.NONE
+
+    def _unlink(self, e):
+        u = self._tails[e]
+        v = self._heads[e]
+        for first, next, w in ((self._first_out, self._next_out, u),
+                               (self._first_in, self._next_in, v),):
+            previous = self.NONE
+            f = first[w]
+            while f != e:
+                previous = f
+                f = next[f]
+            if previous < 0:
+                first[w] = next[e]
+            else:
+                next[previous] = next[e]
+        self._release(e)
+
+    def _filter(self, first, next, w, edges):
+        # unlinks the given edges from a list of w
+        previous = self.NONE
+        e = first[w]
+        while e >= 0:
+            if e in edges:
+                if previous < 0:
+                    first[w] = next[e]
+                else:
+                    next[previous] = next[e]
+            else:
+                previous = e
+            e = next[e]
+
+    def _release(self, e):
+        self._tails[e] = self.NONE
+        self._heads[e] = self.NONE
+        self._edge_data.pop(e, None)
+        self._free.append(e)
+        self._size -= 1
+
+    def _edge(self, e, data, keys):
+        edge = (self._tails[e], self._heads[e],)
+        if keys:
+            edge += (self._keys[e],)
+        if data:
+            edge += (self._edge_data.get(e, {}),)
+        return edge
+
+    def has_edge(self, u, v, key=None):
+        return self._find(u, v, key) >= 0
+
+    def size(self):
+        return self._size
+
+    def number_of_edges(self, u=None, v=None):
+        if u is None:
+            return self._size
+        if not self.has_node(u):
+            return 0
+        heads = self._heads
+        return sum([1 for e in self._out(u) if heads[e] == v])
+
+    def add_edge(self, u, v, key=None, attr_dict=None, **attr):
+        for w in (u, v):
+            if not self.has_node(w):
+                self.add_node(w)
+        if key is None:
+            key = self.number_of_edges(u, v)
+            while self.has_edge(u, v, key):
+                key += 1
+            e = self.NONE
+        else:
+            e = self._find(u, v, key)
+        if e < 0:
+            values = (u, v, key, self._first_out[u], self._first_in[v],)
+            arrays = (self._tails, self._heads, self._keys, self._next_out, self._next_in,)
+            if self._free:
+                e = self._free.pop()
+                for a, x in zip(arrays, values):
+                    a[e] = x
+            else:
+                e = len(self._tails)
+                for a, x in zip(arrays, values):
+                    a.append(x)
+            self._first_out[u] = e
+            self._first_in[v] = e
+            self._size += 1
+        if attr_dict:
+            attr = dict(attr_dict, **attr)
+        if attr:
+            self._edge_data.setdefault(e, {}).update(attr)
+
+    def add_edges_from(self, edges, **attr):
+        for edge in edges:
+            data = {}
+            if len(edge) == 4:
+                u, v, key, data = edge
+            elif len(edge) == 3:
+                u, v, data = edge
+                key = None
+            else:
+                u, v = edge
+                key = None
+            self.add_edge(u, v, key, data, **attr)
+
+    def remove_edge(self, u, v, key=None):
+        e = self._find(u, v, key)
+        if e < 0:
+            raise nx.NetworkXError("The edge %s-%s is not in the graph." % (u, v))
+        self._unlink(e)
+
+    def remove_edges_from(self, edges):
+        for edge in edges:
+            e = self._find(*edge[:3])
+            if e >= 0:
+                self._unlink(e)
+
+    def get_edge_data(self, u, v, key=None, default=None):
+        if key is not None:
+            e = self._find(u, v, key)
+            if e < 0:
+                return default
+            return self._edge_data.get(e, {})
+        heads = self._heads
+        keys = self._keys
+        edge_data = self._edge_data
+        data = dict([(keys[e], edge_data.get(e, {}))
+                     for e in self._out(u) if heads[e] == v]) if self.has_node(u) else {}
+        return data or default
+
+    def out_edges_iter(self, nbunch=None, data=False, keys=False):
+        if nbunch is None:
+            nbunch = self.nodes_iter()
+        elif self.has_node(nbunch):
+            nbunch = (nbunch,)
+        for u in nbunch:
+            if self.has_node(u):
+                for e in self._out(u):
+                    yield self._edge(e, data, keys)
+
+    edges_iter = out_edges_iter
+
+    def in_edges_iter(self, nbunch=None, data=False, keys=False):
+        if nbunch is None:
+            nbunch = self.nodes_iter()
+        elif self.has_node(nbunch):
+            nbunch = (nbunch,)
+        for u in nbunch:
+            if self.has_node(u):
+                for e in self._in(u):
+                    yield self._edge(e, data, keys)
+
+    def edges(self, nbunch=None, data=False, keys=False):
+        return list(self.edges_iter(nbunch, data, keys))
+
+    def successors_iter(self, u):
+        heads = self._heads
+        return (heads[e] for e in self._out(u))
+
+    def predecessors_iter(self, u):
+        tails = self._tails
+        return (tails[e] for e in self._in(u))
+
+    def out_degree(self, u):
+        return sum([1 for e in self._out(u)])
+
+    def in_degree(self, u):
+        return sum([1 for e in self._in(u)])
+
+    def degree(self, u):
+        return self.out_degree(u) + self.in_degree(u)
+
+    #########################################################################
+
+    def clear(self):
+        self.graph.clear()
+        self._reset()
+
+    def copy(self):
+        copy = type(self)(**self.graph)
+        for k, v in self.__dict__.iteritems():
+            if isinstance(v, array.array):
+                v = array.array(v.typecode, v)
+            elif isinstance(v, bytearray):
+                v = bytearray(v)
+            elif k in ('_node_data', '_edge_data',):
+                v = dict([(i, dict(d)) for i, d in v.iteritems()])
+            elif k == 'graph':
+                continue
+            copy.__dict__[k] = v
+        return copy
+
+    def csr(self):
+        r"""Returns (offsets, heads, keys) arrays of the out-edges.
+
+        The out-edges of node u are at offsets[u] to offsets[u+1].
+        """
+        n = len(self._alive)
+        offsets = array.array('l', [0]) * (n + 1)
+        heads = array.array('l')
+        keys = array.array('l')
+        for u in xrange(n):
+            if self._alive[u]:
+                for e in self._out(u):
+                    heads.append(self._heads[e])
+                    keys.append(self._keys[e])
+            offsets[u + 1] = len(heads)
+        return offsets, heads, keys
+
+    def to_networkx(self):
+        g = nx.MultiDiGraph(**self.graph)
+        g.add_nodes_from(self.nodes_iter(data=True))
+        for u, v, k, d in self.edges_iter(data=True, keys=True):
+            g.add_edge(u, v, key=k, **d)
+        return g
+
+#############################################################################
+#############################################################################
@@ -2,6 +2,8 @@
 # @license
 
 import collections
+import itertools
+import weakref
 
 import networkx as nx
 
@@ -10,26 +12,80 @@ import pypetri.trellis as trellis
 #############################################################################
 #############################################################################
 
+class Subscription(object):
+    r"""Stream of the changes committed to a Graph after it was subscribed.
+    
+    If mirrored, keeps a copy of the graph that is brought up to date
+    by replaying the changes, in O(changes) rather than O(graph).
+    """
+    
+    def __init__(self, graph, sequence, target=None):
+        self.graph = graph
+        self.sequence = sequence
+        self.target = target
+    
+    def poll(self):
+        r"""Returns the (sequence, change) pairs committed since the last poll."""
+        changes = self.graph.since(self.sequence)
+        if changes:
+            self.sequence = changes[-1][0]
+            self.graph.trim()
+        return changes
+    
+    def mirror(self):
+        r"""Returns the mirrored graph, after applying the new changes."""
+        target = self.target
+        graph = self.graph
+        for sequence, change in self.poll():
+            graph.apply(target, change, False)
+        return target
+    
+    def close(self):
+        self.graph.unsubscribe(self)
+
 class Graph(collections.Mapping, trellis.Component):
 
-    CHANGE_ACTIONS = range(3)
-    ADD_ACTION, REMOVE_ACTION, CLEAR_ACTION = CHANGE_ACTIONS
-    CHANGE_TYPES = range(2)
-    NODE_TYPE, EDGE_TYPE = CHANGE_TYPES
+    CHANGE_ACTIONS = range(4)
+    ADD_ACTION, REMOVE_ACTION, CLEAR_ACTION, RESTORE_ACTION = CHANGE_ACTIONS
+    CHANGE_TYPES = range(4)
+    NODE_TYPE, EDGE_TYPE, NODES_TYPE, EDGES_TYPE = CHANGE_TYPES
     
     Graph = nx.Graph
     
     graph = trellis.attr(None)
     changes = trellis.todo(list)
     to_change = changes.future
+    
+    # number of committed changes
+    committed = 0
+    # the last committed changes, while there are subscriptions
+    _log = None
+    _subscriptions = None
 
     def __init__(self, graph=None, *args, **kwargs):
         if graph is None:
             graph = self.Graph(*args, **kwargs)
         super(Graph, self).__init__(graph=graph)
-        for k in dir(graph):
-            if not hasattr(self, k):
-                setattr(self, k, getattr(graph, k))
+
+    # read-only methods and attributes of the graph,
+    # which may be used without going through the changes
+    READ_ONLY = frozenset([
+        'name', 'node', 'edge', 'adj', 'succ', 'pred',
+        'has_node', 'nodes', 'nodes_iter', 'nbunch_iter',
+        'order', 'number_of_nodes',
+        'has_edge', 'edges', 'edges_iter', 'get_edge_data',
+        'in_edges', 'in_edges_iter', 'out_edges', 'out_edges_iter',
+        'size', 'number_of_edges',
+        'neighbors', 'neighbors_iter',
+        'successors', 'successors_iter', 'predecessors', 'predecessors_iter',
+        'degree', 'degree_iter', 'in_degree', 'in_degree_iter',
+        'out_degree', 'out_degree_iter',
+        'is_directed', 'is_multigraph', 'copy', 'to_networkx', 'csr',])
+
+    def __getattr__(self, name):
+        if name not in self.READ_ONLY:
+            raise AttributeError(name)
+        return getattr(self.graph, name)
 
     def __getitem__(self, key):
         return self.graph[key]
@@ -46,9 +102,9 @@ class Graph(collections.Mapping, trellis.Component):
         self.to_change.append(change)
         
     @trellis.modifier
-    def add_nodes_from(self, nbunch):
-        for n in nbunch:
-            self.add_node(n)
+    def add_nodes_from(self, nbunch, **kwargs):
+        change = (self.ADD_ACTION, self.NODES_TYPE, (list(nbunch),), kwargs,)
+        self.to_change.append(change)
         
     @trellis.modifier
     def remove_node(self, *args, **kwargs):
@@ -57,8 +113,8 @@ class Graph(collections.Mapping, trellis.Component):
         
     @trellis.modifier
     def remove_nodes_from(self, nbunch):
-        for n in nbunch:
-            self.remove_node(n)
+        change = (self.REMOVE_ACTION, self.NODES_TYPE, (list(nbunch),), {},)
+        self.to_change.append(change)
             
     @trellis.modifier
     def add_edge(self, *args, **kwargs):
@@ -66,9 +122,9 @@ class Graph(collections.Mapping, trellis.Component):
         self.to_change.append(change)
         
     @trellis.modifier
-    def add_edges_from(self, ebunch):
-        for e in ebunch:
-            self.add_edge(*e)
+    def add_edges_from(self, ebunch, **kwargs):
+        change = (self.ADD_ACTION, self.EDGES_TYPE, (list(ebunch),), kwargs,)
+        self.to_change.append(change)
             
     @trellis.modifier
     def remove_edge(self, *args, **kwargs):
@@ -77,21 +133,19 @@ class Graph(collections.Mapping, trellis.Component):
         
     @trellis.modifier
     def remove_edges_from(self, ebunch):
-        for e in ebunch:
-            self.remove_edge(*e)
+        change = (self.REMOVE_ACTION, self.EDGES_TYPE, (list(ebunch),), {},)
+        self.to_change.append(change)
             
     @trellis.modifier
     def add_star(self, nbunch):
         self.add_nodes_from(nbunch)
         hub = nbunch[0]
-        for i in xrange(1, len(nbunch)):
-            self.add_edge(hub, nbunch[i])
+        self.add_edges_from([(hub, n) for n in nbunch[1:]])
         
     @trellis.modifier
     def add_path(self, nbunch):
         self.add_nodes_from(nbunch)
-        for i in xrange(len(nbunch)-1):
-            self.add_edge(nbunch[i],nbunch[i+1])
+        self.add_edges_from(zip(nbunch[:-1], nbunch[1:]))
         
     @trellis.modifier
     def add_cycle(self, nbunch):
@@ -108,9 +162,166 @@ class Graph(collections.Mapping, trellis.Component):
         graph = self.graph
         for change in self.changes:
             self.apply(graph, change)
+            self.commit(change)
         if self.changes:
             trellis.mark_dirty()
 
+    def commit(self, change):
+        logged = bool(self._subscriptions)
+        if logged:
+            self._log.append(change)
+        elif self._log:
+            self._log.clear()
+        self.committed += 1
+        trellis.on_undo(self.uncommit, logged)
+    
+    def uncommit(self, logged):
+        if logged:
+            self._log.pop()
+        self.committed -= 1
+    
+    def subscribe(self, mirror=False):
+        r"""Returns a Subscription to the changes committed from now on.
+        
+        If mirror, the subscription keeps a snapshot up to date.
+        """
+        if self._subscriptions is None:
+            self._subscriptions = weakref.WeakKeyDictionary()
+            self._log = collections.deque()
+        subscription = Subscription(self, self.committed, 
+                                    self.snapshot() if mirror else None)
+        self._subscriptions[subscription] = None
+        return subscription
+    
+    def unsubscribe(self, subscription):
+        self._subscriptions.pop(subscription, None)
+        self.trim()
+    
+    def since(self, sequence):
+        r"""Returns the (sequence, change) pairs committed after sequence."""
+        log = self._log
+        first = self.committed - len(log) + 1
+        if sequence + 1 < first:
+            raise ValueError(sequence)
+        return [(first + i, log[i]) for i in xrange(sequence + 1 - first, len(log))]
+    
+    def trim(self):
+        r"""Forgets the changes that every subscription has seen."""
+        log = self._log
+        subscriptions = self._subscriptions
+        if subscriptions:
+            first = self.committed - len(log) + 1
+            seen = min([s.sequence for s in subscriptions.keys()])
+            for i in xrange(seen - first + 1):
+                log.popleft()
+        else:
+            log.clear()
+
+    @staticmethod
+    def key(graph, args, kwargs):
+        r"""Key of an edge change to a multigraph, if given."""
+        if not graph.is_multigraph():
+            return None
+        if len(args) > 2:
+            return args[2]
+        return kwargs.get('key')
+    
+    @staticmethod
+    def newkey(graph, u, v):
+        r"""The key that a multigraph would assign to a new edge."""
+        key = graph.number_of_edges(u, v)
+        while graph.has_edge(u, v, key):
+            key += 1
+        return key
+    
+    def add_edges(self, graph, edges, kwargs):
+        r"""Adds (u, v[, key][, data]) edges, returning the added (u, v[, key])."""
+        added = []
+        multigraph = graph.is_multigraph()
+        for edge in edges:
+            u, v = edge[0:2]
+            data = dict(kwargs)
+            key = None
+            if len(edge) > 3 or (len(edge) > 2 and not isinstance(edge[2], dict)):
+                key = edge[2]
+            if len(edge) > 2 and isinstance(edge[-1], dict):
+                data.update(edge[-1])
+            if 'key' in data:
+                key = data.pop('key')
+            if multigraph:
+                # as for simple graphs, an edge without a key
+                # is only added if there is none between u and v
+                if key is None:
+                    if graph.has_edge(u, v):
+                        continue
+                    key = self.newkey(graph, u, v)
+                elif graph.has_edge(u, v, key):
+                    continue
+                graph.add_edge(u, v, key, **data)
+                added.append((u, v, key,))
+            elif not graph.has_edge(u, v):
+                graph.add_edge(u, v, **data)
+                added.append((u, v,))
+        return added
+    
+    def remove_edges(self, graph, edges):
+        r"""Removes (u, v[, key]) edges, returning the removed (u, v[, key], data)."""
+        removed = []
+        multigraph = graph.is_multigraph()
+        for edge in edges:
+            u, v = edge[0:2]
+            key = edge[2] if multigraph and len(edge) > 2 else None
+            if key is None:
+                data = graph.get_edge_data(u, v)
+                if data is None:
+                    continue
+                if multigraph:
+                    key = iter(data).next()
+                    data = data[key]
+            else:
+                data = graph.get_edge_data(u, v, key)
+                if data is None:
+                    continue
+            if multigraph:
+                graph.remove_edge(u, v, key)
+                removed.append((u, v, key, data,))
+            else:
+                graph.remove_edge(u, v)
+                removed.append((u, v, data,))
+        return removed
+    
+    def remove_nodes(self, graph, nodes):
+        r"""Removes nodes, returning undo changes.
+        
+        The undo changes refer to the removed attribute dicts, 
+        rather than copying them.
+        """
+        removed = []
+        datas = []
+        edges = []
+        multigraph = graph.is_multigraph()
+        for u in nodes:
+            if not graph.has_node(u):
+                continue
+            removed.append(u)
+            datas.append(graph.node[u])
+            if graph.is_directed():
+                edges.extend(graph.out_edges_iter(u, data=True, keys=True) 
+                             if multigraph else graph.out_edges_iter(u, data=True))
+                edges.extend(graph.in_edges_iter(u, data=True, keys=True) 
+                             if multigraph else graph.in_edges_iter(u, data=True))
+            else:
+                edges.extend(graph.edges_iter(u, data=True, keys=True)
+                             if multigraph else graph.edges_iter(u, data=True))
+            graph.remove_node(u)
+        undos = []
+        if removed:
+            # the nodes before their edges
+            undos.append((self.ADD_ACTION, self.NODES_TYPE, (removed, datas,), {},))
+            if edges:
+                undos.append((self.ADD_ACTION, self.EDGES_TYPE, (edges,), {},))
+        return undos
+    
     def apply(self, graph, change, log=True):
         undos = []
         action = change[0]
@@ -118,43 +329,62 @@ class Graph(collections.Mapping, trellis.Component):
             type, args, kwargs = change[1:]
             if type == self.NODE_TYPE:
                 if not graph.has_node(args[0]):
-                    undo = (self.REMOVE_ACTION, type, args,)
+                    undo = (self.REMOVE_ACTION, type, args[:1], {},)
                     undos.append(undo)
                     graph.add_node(*args, **kwargs)
+            elif type == self.NODES_TYPE:
+                nodes = args[0]
+                datas = args[1] if len(args) > 1 else None
+                added = []
+                for i, u in enumerate(nodes):
+                    if not graph.has_node(u):
+                        added.append(u)
+                        if datas is None:
+                            graph.add_node(u, **kwargs)
+                        else:
+                            graph.add_node(u, datas[i], **kwargs)
+                if added:
+                    undo = (self.REMOVE_ACTION, type, (added,), {},)
+                    undos.append(undo)
             elif type == self.EDGE_TYPE:
-                if not graph.has_edge(*args[0:2]):
-                    undo = (self.REMOVE_ACTION, type, args,)
+                added = self.add_edges(graph, (args,), kwargs)
+                if added:
+                    undo = (self.REMOVE_ACTION, type, added[0], {},)
+                    undos.append(undo)
+            elif type == self.EDGES_TYPE:
+                added = self.add_edges(graph, args[0], kwargs)
+                if added:
+                    undo = (self.REMOVE_ACTION, type, (added,), {},)
                     undos.append(undo)
-                    graph.add_edge(*args, **kwargs)
         elif action == self.REMOVE_ACTION:
             type, args, kwargs = change[1:]
             if type == self.NODE_TYPE:
-                u = args[0]
-                if graph.has_node(u):
-                    edges = graph.edges(u, data=True)
-                    for edge in edges:
-                        undo = (self.ADD_ACTION, self.EDGE_TYPE, edge[:2], edge[2],)
-                        undos.append(undo)
-                    undo = (self.ADD_ACTION, type, (u,), dict(graph.node[u]),)
-                    undos.append(undo)
-                    graph.remove_node(*args, **kwargs)
+                undos.extend(self.remove_nodes(graph, args[:1]))
+            elif type == self.NODES_TYPE:
+                undos.extend(self.remove_nodes(graph, args[0]))
             elif type == self.EDGE_TYPE:
-                u,v = args[0:2]
-                if graph.has_edge(u,v):
-                    undo = (self.ADD_ACTION, type, args, dict(graph.edge[u][v]),)
+                key = self.key(graph, args, kwargs)
+                edge = args[0:2] if key is None else args[0:2] + (key,)
+                removed = self.remove_edges(graph, (edge,))
+                if removed:
+                    undo = (self.ADD_ACTION, type, removed[0][:-1], removed[0][-1],)
+                    undos.append(undo)
+            elif type == self.EDGES_TYPE:
+                removed = self.remove_edges(graph, args[0])
+                if removed:
+                    undo = (self.ADD_ACTION, type, (removed,), {},)
                     undos.append(undo)
-                    graph.remove_edge(*args, **kwargs)
         elif action == self.CLEAR_ACTION:
-            for n in graph.nodes_iter(data=True):
-                undo = (self.ADD_ACTION, self.NODE_TYPE, n[:1], n[-1],)
-                undos.append(undo)
-            for e in graph.edges_iter(data=True):
-                undo = (self.ADD_ACTION, self.EDGE_TYPE, e[:2], e[-1],)
-                undos.append(undo)
-            graph.clear()
+            # swaps in an empty graph, so the undo is O(1)
+            state = graph.__dict__
+            graph.__dict__ = graph.__class__().__dict__
+            undo = (self.RESTORE_ACTION, state,)
+            undos.append(undo)
+        elif action == self.RESTORE_ACTION:
+            graph.__dict__ = change[1]
         else:
             assert False
-        if log:
+        if log and undos:
             trellis.on_undo(self.undo, graph, undos)
 
     def undo(self, graph, changes):
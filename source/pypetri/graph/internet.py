@@ -27,38 +27,129 @@ class InternetworkGraph(trellis.Component):
         super(InternetworkGraph, self).__init__(graphs=graphs,
                                                 graph=g,)
 
+    # vertex -> subnet name
+    _owners = None
+    # subnet name -> (subgraph, vertices)
+    _members = None
+    # subnet name -> (outgoing arcs, incoming arcs)
+    _boundaries = None
+    # arc -> (input subnet name, output subnet name), either may be None
+    _crossings = None
+    
+    def outgoing(self, k):
+        r"""Arcs from the vertices of subnet k to vertices outside it."""
+        # brings the index up to date
+        self.edges
+        return frozenset(self._boundaries[k][0])
+    
+    def incoming(self, k):
+        r"""Arcs to the vertices of subnet k from vertices outside it."""
+        self.edges
+        return frozenset(self._boundaries[k][1])
+    
+    def own(self, k, subgraph, vertex):
+        owners = self._owners
+        vertices = self._members[k][1]
+        if subgraph.vertices.get(subgraph.toname(vertex)) is vertex:
+            owners[vertex] = k
+            vertices.add(vertex)
+        elif owners.get(vertex) == k:
+            del owners[vertex]
+            vertices.discard(vertex)
+    
+    def locate(self, arc):
+        r"""Returns the (input, output) subnet names of arc, 
+        or None if it doesn't cross a boundary."""
+        u, v = arc.input, arc.output
+        if u is None or v is None or arc not in u.outputs:
+            return None
+        owners = self._owners
+        edge = owners.get(u), owners.get(v)
+        if edge[0] == edge[1]:
+            return None
+        return edge
+    
+    def relocate(self, arc):
+        r"""Returns True if the crossing of arc changed."""
+        crossings = self._crossings
+        boundaries = self._boundaries
+        current = self.edges
+        graph = self.graph
+        edge = self.locate(arc)
+        previous = crossings.get(arc)
+        if edge == previous:
+            return False
+        if previous is not None:
+            del crossings[arc]
+            for i, k in enumerate(previous):
+                if k in boundaries:
+                    boundaries[k][i].discard(arc)
+            if arc in current:
+                graph.remove_edge(*previous, key=id(arc))
+                del current[arc]
+        if edge is not None:
+            crossings[arc] = edge
+            for i, k in enumerate(edge):
+                if k is not None:
+                    boundaries[k][i].add(arc)
+            if None not in edge:
+                current[arc] = edge
+                graph.add_edge(*edge, key=id(arc))
+        return True
+    
     @trellis.maintain(make=dict)
     def edges(self):
+        # O(changed arcs), after the first
         current = self.edges
-        new = {}
-        graph = self.graph
-        for k,subgraph in self.vertices.iteritems():
-            for vertex in subgraph.vertices.itervalues():
-                for o in vertex.outputs:
-                    if o not in subgraph.edges:
-                        if o in new:
-                            output = new[o][1]
-                        else:
-                            output = None
-                        new[o] = (k, output)
-                for i in vertex.inputs:
-                    if i not in subgraph.edges:
-                        if i in new:
-                            input = new[i][0]
-                        else:
-                            input = None
-                        new[i] = (input, k)
-        removed = [k for k in current if k not in new or current[k] is not new[k]]
+        subnets = self.vertices
+        members = self._members
+        if members is None:
+            members = self._members = {}
+            self._owners = {}
+            self._boundaries = {}
+            self._crossings = {}
+        owners = self._owners
+        boundaries = self._boundaries
+        arcs = set()
+        removed = [k for k in members if subnets.get(k) is not members[k][0]]
         for k in removed:
-            edge = current[k]
-            graph.remove_edge(*edge, key=id(k))
-            del current[k]
-        added = [k for k in new if k not in current]
-        for k in added:
-            edge = new[k]
-            current[k] = edge
-            graph.add_edge(*edge, key=id(k))
-        if added or removed:
+            for vertex in members.pop(k)[1]:
+                if owners.get(vertex) == k:
+                    del owners[vertex]
+            for crossing in boundaries.pop(k):
+                arcs.update(crossing)
+        for k, subgraph in subnets.iteritems():
+            if k in members:
+                updated = subgraph.updated
+                if None not in updated:
+                    for arc in updated:
+                        arcs.add(arc)
+                        for vertex in (arc.input, arc.output):
+                            if vertex is not None:
+                                self.own(k, subgraph, vertex)
+                    continue
+                previous = members[k][1]
+            else:
+                boundaries[k] = (set(), set())
+                previous = set()
+            # rescan the subnet
+            vertices = set(subgraph.vertices.itervalues())
+            members[k] = (subgraph, vertices)
+            for vertex in previous - vertices:
+                if owners.get(vertex) == k:
+                    del owners[vertex]
+            for vertex in vertices:
+                owners[vertex] = k
+            for vertex in previous | vertices:
+                arcs.update(vertex.inputs)
+                arcs.update(vertex.outputs)
+            for crossing in boundaries[k]:
+                arcs.update(crossing)
+        changed = False
+        for arc in arcs:
+            if self.relocate(arc):
+                changed = True
+        if changed:
             trellis.mark_dirty()
         return current
         
@@ -87,6 +178,12 @@ class InternetworkGraph(trellis.Component):
             trellis.mark_dirty()
         return current
 
+    def subscribe(self, mirror=False):
+        r"""Returns a graph.Subscription to the changes of the 
+        internetwork graph (not flattened)."""
+        self.edges
+        return self.graph.subscribe(mirror)
+    
     def snapshot(self, flatten=False, toname=lambda g,v: '.'.join((g,v)) if g else v):
         g = self.graph.snapshot()
         if not flatten:
@@ -118,7 +215,7 @@ class InternetworkGraph(trellis.Component):
             v = toname(output, subgraph.toname(v))
             assert v in g
             k = id(arc)
-            d = g.edge[edge[0]][edge[1]][k]
+            d = g.get_edge_data(edge[0], edge[1], k)
             g.add_edge(u, v, key=k, **d)
         # remove aggregated vertices/edges
         g.remove_nodes_from(self.vertices.keys())
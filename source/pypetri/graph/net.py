@@ -8,11 +8,39 @@ import networkx as nx
 from .. import trellis
 
 from .. import net
+from ..collections import sets
 from . import graph
 
 #############################################################################
 #############################################################################
 
+class Observer(trellis.Component):
+    r"""Forwards the arcs that change at a vertex to a NetworkGraph."""
+    
+    vertex = trellis.attr(None)
+    target = trellis.attr(None)
+    
+    @trellis.maintain
+    def observe(self):
+        vertex = self.vertex
+        target = self.target
+        if vertex is None or target is None:
+            return
+        arcs = []
+        for observed in (vertex.inputs, vertex.outputs):
+            changed = sets.delta(observed.changes)
+            if changed is None:
+                # the removed arcs are unknown
+                arcs.append(None)
+            else:
+                for items in changed:
+                    arcs.extend(items)
+        if arcs:
+            target.to_update.extend(arcs)
+
+#############################################################################
+#############################################################################
+
 class NetworkGraph(trellis.Component):
 
     Graph = nx.MultiDiGraph
@@ -21,6 +49,13 @@ class NetworkGraph(trellis.Component):
     network = trellis.make()
     graph = trellis.make()
     
+    # arcs to update, where None updates all
+    updated = trellis.todo(list)
+    to_update = updated.future
+    
+    # vertex -> Observer
+    _observers = None
+    
     def __init__(self, network, toname, g=None, **kwargs):
         if g is None:
             if 'name' not in kwargs:
@@ -31,50 +66,93 @@ class NetworkGraph(trellis.Component):
                                            toname=toname, 
                                            graph=g,)
 
+    def locate(self, arc):
+        r"""Returns the (input, output) names of arc, or None if not graphed."""
+        vertices = self.vertices
+        u, v = arc.input, arc.output
+        if u is None or v is None or arc not in u.outputs:
+            return None
+        u, v = self.toname(u), self.toname(v)
+        if u in vertices and v in vertices:
+            return u, v
+        return None
+    
     @trellis.maintain(make=dict)
     def edges(self):
+        # O(changed arcs)
         current = self.edges
-        new = {}
-        toname = self.toname
         vertices = self.vertices
         graph = self.graph
-        for node,vertex in vertices.iteritems():
-            for o in vertex.outputs:
-                output = toname(o.output)
-                if output in vertices:
-                    edge = (node, output)
-                    new[o] = edge
-        removed = [k for k in current if k not in new or current[k] is not new[k]]
-        for k in removed:
-            edge = current[k]
-            graph.remove_edge(*edge, key=id(k))
-            del current[k]
-        added = [k for k in new if k not in current]
-        for k in added:
-            edge = new[k]
-            current[k] = edge
-            graph.add_edge(*edge, key=id(k))
-        if added or removed:
+        arcs = self.updated
+        if None in arcs:
+            arcs = set(current)
+            for vertex in vertices.itervalues():
+                arcs.update(vertex.outputs)
+        changed = False
+        for arc in arcs:
+            edge = self.locate(arc)
+            previous = current.get(arc)
+            if edge == previous:
+                continue
+            changed = True
+            if previous is not None:
+                graph.remove_edge(*previous, key=id(arc))
+                del current[arc]
+            if edge is not None:
+                current[arc] = edge
+                graph.add_edge(*edge, key=id(arc))
+        if changed:
             trellis.mark_dirty()
         return current
         
     @trellis.maintain(make=dict)
     def vertices(self):
+        # O(changed vertices), after the first
         network = self.network
         graph = self.graph
         toname = self.toname
-        new = dict([(toname(v), v) for v in itertools.chain(network.conditions, network.transitions)])
         current = self.vertices
-        removed = [k for k in current if k not in new or current[k] is not new[k]]
-        for k in removed:
+        observers = self._observers
+        deltas = None
+        if observers is not None:
+            deltas = (sets.delta(network.conditions.changes), 
+                      sets.delta(network.transitions.changes),)
+            if None in deltas:
+                deltas = None
+        if deltas is None:
+            if observers is None:
+                observers = self._observers = {}
+            new = dict([(toname(v), v) for v in itertools.chain(network.conditions, network.transitions)])
+            removed = [v for k, v in current.iteritems() if new.get(k) is not v]
+            added = [v for k, v in new.iteritems() if current.get(k) is not v]
+        else:
+            removed = []
+            added = []
+            for delta, vertices in zip(deltas, (network.conditions, network.transitions)):
+                for v in delta[1]:
+                    if v not in vertices and current.get(toname(v)) is v:
+                        removed.append(v)
+                for v in delta[0]:
+                    if v in vertices and current.get(toname(v)) is not v:
+                        added.append(v)
+        arcs = []
+        for v in removed:
+            k = toname(v)
             graph.remove_node(k)
             del current[k]
-        added = [k for k in new if k not in current]
-        for k in added:
-            v = new[k]
+            observers.pop(v).vertex = None
+            arcs.extend(v.inputs)
+            arcs.extend(v.outputs)
+        for v in added:
+            k = toname(v)
             current[k] = v
             role = 'condition' if v in network.conditions else 'transition'
             graph.add_node(k, role=role)
+            observers[v] = Observer(vertex=v, target=self)
+            arcs.extend(v.inputs)
+            arcs.extend(v.outputs)
+        if arcs:
+            self.to_update.extend(arcs)
         if added or removed:
             trellis.mark_dirty()
         return current
@@ -82,6 +160,12 @@ class NetworkGraph(trellis.Component):
     @trellis.compute
     def snapshot(self):
         return self.graph.snapshot
+    
+    def subscribe(self, mirror=False):
+        r"""Returns a graph.Subscription to the changes of the graph."""
+        # brings the graph up to date
+        self.edges
+        return self.graph.subscribe(mirror)
 
 #############################################################################
 #############################################################################
@@ -0,0 +1,179 @@
+# @copyright
+# @license
+
+r"""Multi-process state space exploration.
+
+The states are partitioned across worker processes by hash.
+Each worker builds its network once by calling factory, which must be
+picklable and return a reachability.Explorer whose conditions and
+transitions are listed in the same order in every process.
+Tokens in markings must hash by value.
+
+Exploration proceeds in rounds.  In each round, every worker expands
+the states it received in the previous round that it has not seen,
+and sends one batch of successors to the inbox of every worker.
+"""
+
+import Queue
+import multiprocessing
+import traceback
+
+from . import reachability
+
+#############################################################################
+#############################################################################
+
+EXPAND, COLLECT = range(2)
+
+# seconds between checks that the workers are alive, while waiting
+POLL = 1.0
+
+def owner(state, count):
+    return hash(state) % count
+
+#############################################################################
+#############################################################################
+
+def work(factory, index, count, control, inboxes, outbox, edges=False):
+    try:
+        explorer = factory()
+        current = explorer.snapshot()
+        inbox = inboxes[index]
+        found = []
+        # batches left over after the last round are discarded
+        for q in inboxes:
+            q.cancel_join_thread()
+        # batches that arrive before their round
+        early = {}
+        round = 0
+        while True:
+            command = control.get()
+            if command is None:
+                break
+            if command == COLLECT:
+                outbox.put(('collected', index, explorer.states, found))
+                continue
+            expected = 1 if round == 0 else count
+            batches = early.pop(round, [])
+            while len(batches) < expected:
+                r, states = inbox.get()
+                if r == round:
+                    batches.append(states)
+                else:
+                    early.setdefault(r, []).append(states)
+            outgoing = [set() for i in xrange(count)]
+            new = 0
+            deadlocks = []
+            for states in batches:
+                for state in states:
+                    if state in explorer.ids:
+                        continue
+                    explorer.add(state)
+                    new += 1
+                    explorer.restore(state, current)
+                    current = state
+                    n = 0
+                    for t, successor in explorer.successors(state):
+                        n += 1
+                        outgoing[owner(successor, count)].add(successor)
+                        if edges:
+                            found.append((state, t, successor))
+                    if not n:
+                        deadlocks.append(state)
+            round += 1
+            sent = 0
+            for i, states in enumerate(outgoing):
+                sent += len(states)
+                inboxes[i].put((round, list(states)))
+            outbox.put(('expanded', index, new, sent, deadlocks))
+    except Exception:
+        outbox.put(('error', index, traceback.format_exc()))
+
+#############################################################################
+#############################################################################
+
+def explore(factory, processes=None, limit=None, edges=False):
+    r"""Returns a reachability.StateSpace explored by processes workers.
+
+    The limit on the number of states is checked between rounds.
+    Edges are only collected if requested.
+    """
+    explorer = factory()
+    initial = explorer.snapshot()
+    count = processes or multiprocessing.cpu_count()
+    control = [multiprocessing.Queue() for i in xrange(count)]
+    inboxes = [multiprocessing.Queue() for i in xrange(count)]
+    outbox = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=work,
+                                       args=(factory, i, count, control[i],
+                                             inboxes, outbox, edges))
+               for i in xrange(count)]
+
+    def receive(tag):
+        # a worker that dies without reporting an error would never reply
+        while True:
+            try:
+                message = outbox.get(timeout=POLL)
+            except Queue.Empty:
+                for worker in workers:
+                    if not worker.is_alive():
+                        raise RuntimeError('%s exited with code %s'
+                                           % (worker.name, worker.exitcode))
+            else:
+                break
+        if message[0] == 'error':
+            raise RuntimeError(message[2])
+        assert message[0] == tag
+        return message[1:]
+
+    result = reachability.StateSpace(explorer.transitions)
+    for worker in workers:
+        worker.daemon = True
+        worker.start()
+    try:
+        start = owner(initial, count)
+        for i in xrange(count):
+            inboxes[i].put((0, [initial] if i == start else []))
+        total = 0
+        deadlocks = []
+        while True:
+            for c in control:
+                c.put(EXPAND)
+            sent = 0
+            for i in xrange(count):
+                index, n, m, d = receive('expanded')
+                total += n
+                sent += m
+                deadlocks.extend(d)
+            if not sent:
+                result.complete = True
+                break
+            if limit is not None and total >= limit:
+                break
+
+        # number states and edges in the parent
+        for c in control:
+            c.put(COLLECT)
+        collected = [receive('collected') for i in xrange(count)]
+        result.add(initial)
+        for index, states, e in collected:
+            for state in states:
+                if state not in result.ids:
+                    result.add(state)
+        ids = result.ids
+        for index, states, e in collected:
+            for u, t, v in e:
+                if v in ids:
+                    result.connect(ids[u], t, ids[v])
+        result.deadlocks.extend([ids[state] for state in deadlocks])
+    finally:
+        for c in control:
+            c.put(None)
+        for worker in workers:
+            worker.join(1)
+            if worker.is_alive():
+                worker.terminate()
+    return result
+
+#############################################################################
+#############################################################################
@@ -0,0 +1,322 @@
+# @copyright
+# @license
+
+r"""State space exploration.
+
+A state is the tuple of the snapshots of a fixed sequence of conditions.
+States are numbered in the order they are discovered,
+and edges are (source, transition, target) triples of indices.
+"""
+
+import collections
+import sys
+
+import networkx as nx
+
+from .. import trellis
+from .. import net
+
+#############################################################################
+#############################################################################
+
+OMEGA = float('inf')
+
+@trellis.modifier
+def fire(event):
+    return event()
+
+#############################################################################
+#############################################################################
+
+class StateSpace(object):
+
+    Graph = nx.MultiDiGraph
+
+    def __init__(self, transitions, limit=None, budget=None):
+        self.transitions = tuple(transitions)
+        # maximum number of states
+        self.limit = limit
+        # approximate maximum number of bytes of states and edges
+        self.budget = budget
+        self.size = 0
+        self.states = []
+        self.ids = {}
+        self.edges = []
+        self.deadlocks = []
+        self.complete = False
+
+    def __len__(self):
+        return len(self.states)
+
+    def exhausted(self):
+        if self.limit is not None and len(self.states) >= self.limit:
+            return True
+        if self.budget is not None and self.size >= self.budget:
+            return True
+        return False
+
+    def add(self, state):
+        i = len(self.states)
+        self.states.append(state)
+        self.ids[state] = i
+        self.size += sys.getsizeof(state)
+        return i
+
+    def connect(self, source, transition, target):
+        edge = (source, transition, target)
+        self.edges.append(edge)
+        self.size += sys.getsizeof(edge)
+
+    def graph(self, **kwargs):
+        g = self.Graph(**kwargs)
+        for i, state in enumerate(self.states):
+            g.add_node(i, marking=state)
+        transitions = self.transitions
+        for u, t, v in self.edges:
+            g.add_edge(u, v, transition=transitions[t])
+        return g
+
+#############################################################################
+#############################################################################
+
+class Explorer(StateSpace):
+    r"""Reachability graph of a network, from its current marking.
+
+    The conditions and transitions default to those of the network,
+    but may be given explicitly to explore composed networks.
+    
+    If reduce, only a stubborn subset of the enabled transitions is
+    expanded in each state, which preserves deadlocks.  A state is fully
+    expanded if the subset leads back to a known state.
+    """
+
+    def __init__(self, network=None, conditions=None, transitions=None,
+                 depth=False, reduce=False, **kwargs):
+        if conditions is None:
+            conditions = network.conditions
+        if transitions is None:
+            transitions = network.transitions
+        super(Explorer, self).__init__(transitions, **kwargs)
+        self.conditions = tuple(conditions)
+        # depth-first instead of breadth-first
+        self.depth = depth
+        self.reduce = reduce
+        self.indices = dict([(t, i) for i, t in enumerate(self.transitions)])
+        self._dependents = None
+
+    @property
+    def dependents(self):
+        r"""For each transition, the transitions that share a condition with it."""
+        if self._dependents is None:
+            indices = self.indices
+            dependents = []
+            for t in self.transitions:
+                related = set()
+                for c in net.preset(t) + net.postset(t):
+                    for u in net.preset(c) + net.postset(c):
+                        if u in indices:
+                            related.add(indices[u])
+                dependents.append(frozenset(related))
+            self._dependents = dependents
+        return self._dependents
+
+    def enablers(self, i):
+        r"""Transitions that must fire before disabled transition i can."""
+        t = self.transitions[i]
+        # unless every input is required, a combinator fires any non-empty
+        # subset of its inputs, so any one empty input is no scapegoat
+        if not getattr(t.mux, 'required', False):
+            return self.dependents[i]
+        indices = self.indices
+        for c in net.preset(t):
+            for event in c.next():
+                break
+            else:
+                return [indices[u] for u in net.preset(c) if u in indices]
+        # disabled by something other than an empty input
+        return self.dependents[i]
+
+    def stubborn(self, enabled):
+        r"""Returns a stubborn subset of the enabled transition indices."""
+        dependents = self.dependents
+        start = min(enabled, key=lambda i: len(dependents[i]))
+        chosen = set([start])
+        work = [start]
+        while work:
+            i = work.pop()
+            if i in enabled:
+                related = dependents[i]
+            else:
+                related = self.enablers(i)
+            for j in related:
+                if j not in chosen:
+                    chosen.add(j)
+                    work.append(j)
+        return chosen & enabled
+
+    def snapshot(self):
+        return tuple([c.snapshot() for c in self.conditions])
+
+    @trellis.modifier
+    def restore(self, state, current=None):
+        if current is None:
+            current = self.snapshot()
+        for c, snapshot, previous in zip(self.conditions, state, current):
+            if snapshot != previous:
+                c.restore(snapshot)
+
+    def events(self):
+        r"""Yields (transition index, event) for the current state."""
+        for i, t in enumerate(self.transitions):
+            for event in list(t.next()):
+                yield i, event
+
+    def successors(self, state, events=None):
+        r"""Yields (transition index, state) for every event enabled in state.
+
+        Assumes that the network is currently in state.
+        Events that fail (e.g. by violating a bound) are skipped.
+        """
+        if events is None:
+            events = list(self.events())
+        for i, event in events:
+            try:
+                fire(event)
+            except ValueError:
+                continue
+            successor = self.snapshot()
+            yield i, successor
+            self.restore(state, successor)
+
+    def expand(self, state):
+        if not self.reduce:
+            return self.successors(state)
+        events = list(self.events())
+        if not events:
+            return []
+        chosen = self.stubborn(set([i for i, event in events]))
+        reduced = [(i, event) for i, event in events if i in chosen]
+        successors = list(self.successors(state, reduced))
+        if len(reduced) < len(events):
+            ids = self.ids
+            if not successors or [s for t, s in successors if s in ids]:
+                rest = [(i, event) for i, event in events if i not in chosen]
+                successors.extend(self.successors(state, rest))
+        return successors
+
+    def explore(self):
+        initial = self.snapshot()
+        if initial not in self.ids:
+            self.add(initial)
+        frontier = collections.deque([self.ids[initial]])
+        pop = frontier.pop if self.depth else frontier.popleft
+        current = initial
+        truncated = False
+        while frontier:
+            i = pop()
+            state = self.states[i]
+            self.restore(state, current)
+            current = state
+            n = 0
+            for t, successor in self.expand(state):
+                n += 1
+                j = self.ids.get(successor)
+                if j is None:
+                    if self.exhausted():
+                        truncated = True
+                        continue
+                    j = self.add(successor)
+                    frontier.append(j)
+                self.connect(i, t, j)
+            if not n:
+                self.deadlocks.append(i)
+            if truncated:
+                break
+        self.complete = not (frontier or truncated)
+        # leave the network as we found it
+        self.restore(initial, current)
+        return self
+
+#############################################################################
+#############################################################################
+
+class Coverability(StateSpace):
+    r"""Karp-Miller coverability graph of a compiled flow network.
+
+    Takes a matrix.Incidence.
+    Markings of conditions without a maximum that can grow without bound
+    are accelerated to OMEGA.
+    """
+
+    def __init__(self, incidence, **kwargs):
+        super(Coverability, self).__init__(incidence.transitions, **kwargs)
+        self.pre = [tuple(row) for row in incidence.pre.tolist()]
+        self.change = [tuple(row) for row in incidence.change.tolist()]
+        conditions = incidence.conditions
+        self.unbounded = tuple([c.maximum is None for c in conditions])
+        self.minimum = tuple([-OMEGA if c.minimum is None else c.minimum for c in conditions])
+        self.maximum = tuple([OMEGA if c.maximum is None else c.maximum for c in conditions])
+        self.marking = tuple(incidence.marking.tolist())
+        self.parents = []
+
+    def add(self, state, parent=None):
+        self.parents.append(parent)
+        return super(Coverability, self).add(state)
+
+    def fire(self, marking, transition):
+        for m, p in zip(marking, self.pre[transition]):
+            if m < p:
+                return None
+        successor = [m + d for m, d in zip(marking, self.change[transition])]
+        for m, lo, hi in zip(successor, self.minimum, self.maximum):
+            if m < lo or m > hi:
+                return None
+        return successor
+
+    def accelerate(self, marking, parent):
+        marking = tuple(marking)
+        unbounded = self.unbounded
+        states = self.states
+        parents = self.parents
+        while parent is not None:
+            ancestor = states[parent]
+            if ancestor != marking and \
+              all([m >= a for m, a in zip(marking, ancestor)]):
+                marking = tuple([OMEGA if (u and m > a) else m
+                                 for m, a, u in zip(marking, ancestor, unbounded)])
+            parent = parents[parent]
+        return marking
+
+    def explore(self):
+        initial = self.marking
+        if initial not in self.ids:
+            self.add(initial)
+        frontier = [self.ids[initial]]
+        truncated = False
+        while frontier:
+            i = frontier.pop()
+            state = self.states[i]
+            n = 0
+            for t in xrange(len(self.transitions)):
+                successor = self.fire(state, t)
+                if successor is None:
+                    continue
+                n += 1
+                successor = self.accelerate(successor, i)
+                j = self.ids.get(successor)
+                if j is None:
+                    if self.exhausted():
+                        truncated = True
+                        continue
+                    j = self.add(successor, i)
+                    frontier.append(j)
+                self.connect(i, t, j)
+            if not n:
+                self.deadlocks.append(i)
+            if truncated:
+                break
+        self.complete = not (frontier or truncated)
+        return self
+
+#############################################################################
+#############################################################################
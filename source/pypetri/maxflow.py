@@ -0,0 +1,152 @@
+# @copyright
+# @license
+
+r"""Maximum flow by Dinic's algorithm.
+
+Nodes are integers.  Edges are stored in pairs,
+so that edge ^ 1 is the reverse (residual) edge of edge.
+A capacity of None is unbounded.
+"""
+
+from __future__ import absolute_import
+
+import collections
+
+#############################################################################
+#############################################################################
+
+INFINITE = float('inf')
+
+class Dinic(object):
+
+    def __init__(self, nodes=0):
+        self.adjacency = [[] for i in xrange(nodes)]
+        self.heads = []
+        self.capacities = []
+        self.initial = []
+
+    def __len__(self):
+        return len(self.adjacency)
+
+    def node(self):
+        self.adjacency.append([])
+        return len(self.adjacency) - 1
+
+    def edge(self, u, v, capacity=None):
+        r"""Adds an edge from u to v, returning its index."""
+        if capacity is None:
+            capacity = INFINITE
+        e = len(self.heads)
+        self.heads.extend((v, u))
+        self.capacities.extend((capacity, 0))
+        self.initial.extend((capacity, 0))
+        self.adjacency[u].append(e)
+        self.adjacency[v].append(e + 1)
+        return e
+
+    def reset(self):
+        r"""Removes all flow."""
+        self.capacities[:] = self.initial
+
+    def flow(self, e):
+        r"""Flow along edge e."""
+        return self.initial[e] - self.capacities[e]
+
+    def levels(self, source, sink):
+        levels = [-1] * len(self.adjacency)
+        levels[source] = 0
+        heads = self.heads
+        capacities = self.capacities
+        adjacency = self.adjacency
+        queue = collections.deque([source])
+        while queue:
+            u = queue.popleft()
+            for e in adjacency[u]:
+                v = heads[e]
+                if levels[v] < 0 and capacities[e] > 0:
+                    levels[v] = levels[u] + 1
+                    queue.append(v)
+        if levels[sink] < 0:
+            return None
+        return levels
+
+    def augment(self, source, sink, levels, pointers):
+        r"""Pushes flow along one shortest path, returning the amount."""
+        heads = self.heads
+        capacities = self.capacities
+        adjacency = self.adjacency
+        path = []
+        u = source
+        while True:
+            if u == sink:
+                amount = min([capacities[e] for e in path])
+                if amount == INFINITE:
+                    return amount
+                for e in path:
+                    capacities[e] -= amount
+                    capacities[e ^ 1] += amount
+                return amount
+            edges = adjacency[u]
+            i = pointers[u]
+            while i < len(edges):
+                e = edges[i]
+                v = heads[e]
+                if capacities[e] > 0 and levels[v] == levels[u] + 1:
+                    break
+                i += 1
+            pointers[u] = i
+            if i < len(edges):
+                path.append(edges[i])
+                u = heads[edges[i]]
+            else:
+                # dead end
+                levels[u] = -1
+                if not path:
+                    return 0
+                e = path.pop()
+                u = heads[e ^ 1]
+                pointers[u] += 1
+
+    def maximize(self, source, sink):
+        r"""Adds the maximum flow from source to sink, returning its value."""
+        if source == sink:
+            return INFINITE
+        total = 0
+        while True:
+            levels = self.levels(source, sink)
+            if levels is None:
+                return total
+            pointers = [0] * len(self.adjacency)
+            while True:
+                amount = self.augment(source, sink, levels, pointers)
+                if not amount:
+                    break
+                if amount == INFINITE:
+                    return amount
+                total += amount
+
+    def reachable(self, source):
+        r"""Nodes reachable from source in the residual graph."""
+        heads = self.heads
+        capacities = self.capacities
+        adjacency = self.adjacency
+        seen = set([source])
+        work = [source]
+        while work:
+            u = work.pop()
+            for e in adjacency[u]:
+                v = heads[e]
+                if v not in seen and capacities[e] > 0:
+                    seen.add(v)
+                    work.append(v)
+        return seen
+
+    def cut(self, source):
+        r"""Edges of a minimum cut, after maximize."""
+        reachable = self.reachable(source)
+        heads = self.heads
+        return [e for e in xrange(0, len(heads), 2)
+                if heads[e ^ 1] in reachable and heads[e] not in reachable]
+
+#############################################################################
+#############################################################################
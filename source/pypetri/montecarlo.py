@@ -0,0 +1,142 @@
+# @copyright
+# @license
+
+r"""Monte Carlo replication of network simulations.
+
+Requires concurrent.futures (the futures package on Python 2)
+
+Replications run in worker processes, each with a deterministic seed
+derived from the base seed and the replication index.
+Only the summary returned by each run is sent back,
+and is folded into running estimates as it arrives.
+"""
+
+from __future__ import absolute_import
+
+import hashlib
+import math
+import multiprocessing
+import operator
+import random
+
+import concurrent.futures as futures
+
+#############################################################################
+#############################################################################
+
+def seed(base, replication):
+    r"""Seed of a replication, independent of scheduling."""
+    digest = hashlib.sha1('%r:%d' % (base, replication)).hexdigest()
+    return int(digest[:16], 16)
+
+def shuffled(random, key=operator.attrgetter('created')):
+    r"""Seedable random transition policy for Network.next and Network.step.
+    
+    Sets of transitions are ordered by address, which differs between
+    processes, so the transitions are sorted by key before shuffling.
+    """
+    def policy(transitions):
+        transitions = sorted(transitions, key=key)
+        random.shuffle(transitions)
+        return transitions
+    return policy
+
+def simulate(network, random, steps=1000):
+    r"""Fires the first event of a random enabled transition, steps times."""
+    policy = shuffled(random)
+    fired = 0
+    for i in xrange(steps):
+        try:
+            network(policy)
+        except StopIteration:
+            break
+        fired += 1
+    return {'steps': fired, 'deadlock': float(fired < steps)}
+
+#############################################################################
+#############################################################################
+
+class Summary(object):
+    r"""Running mean and variance of a statistic (Welford's method)."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def variance(self):
+        if self.n < 2:
+            return 0.0
+        return self.m2 / (self.n - 1)
+
+    def interval(self, z=1.96):
+        r"""Normal approximation of a confidence interval of the mean."""
+        halfwidth = z * math.sqrt(self.variance() / self.n) if self.n else 0.0
+        return self.mean - halfwidth, self.mean + halfwidth
+
+#############################################################################
+#############################################################################
+
+def replicate(factory, run, base, index):
+    network = factory()
+    return index, run(network, random.Random(seed(base, index)))
+
+class Replications(object):
+    r"""Runs independent replications of run(factory(), random).
+
+    factory and run must be picklable, and run must return a mapping
+    of statistic names to numbers.
+    """
+
+    def __init__(self, factory, run=simulate, seed=0, max_workers=None, pending=None):
+        self.factory = factory
+        self.run = run
+        self.seed = seed
+        if max_workers is None:
+            max_workers = multiprocessing.cpu_count()
+        self.max_workers = max_workers
+        # maximum number of submitted, unfinished replications
+        self.pending = pending
+        self.summaries = {}
+
+    def add(self, result):
+        summaries = self.summaries
+        for k, v in result.iteritems():
+            if k not in summaries:
+                summaries[k] = Summary()
+            summaries[k].add(v)
+
+    def __call__(self, replications, start=0):
+        r"""Yields (index, result) of replications in order of completion."""
+        indices = iter(xrange(start, start + replications))
+        with futures.ProcessPoolExecutor(self.max_workers) as executor:
+            pending = self.pending
+            if pending is None:
+                pending = 2 * self.max_workers
+            running = set()
+            for index in indices:
+                running.add(executor.submit(replicate, self.factory, self.run, self.seed, index))
+                if len(running) >= pending:
+                    break
+            while running:
+                done, running = futures.wait(running, return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    index, result = future.result()
+                    self.add(result)
+                    yield index, result
+                for index in indices:
+                    running.add(executor.submit(replicate, self.factory, self.run, self.seed, index))
+                    if len(running) >= pending:
+                        break
+
+    def intervals(self, z=1.96):
+        return dict([(k, s.interval(z)) for k, s in self.summaries.iteritems()])
+
+#############################################################################
+#############################################################################
@@ -5,7 +5,9 @@ r"""Petri Net base."""
 
 from __future__ import absolute_import
 
+import array
 import functools
+import itertools
 
 from . import trellis
 
@@ -17,7 +19,8 @@ from .collections import sets
 #############################################################################
 
 class Event(functools.partial):
-    pass
+    # a Python __slots__ class is slower to build and call than partial
+    __slots__ = ()
 
 #############################################################################
 #############################################################################
@@ -30,6 +33,14 @@ def link(arc, source, sink):
     arc.output = sink
     source.outputs.add(arc)
     sink.inputs.add(arc)
+
+def preset(vertex):
+    r"""Vertices with an arc to vertex."""
+    return [arc.input for arc in vertex.inputs if arc.input is not None]
+
+def postset(vertex):
+    r"""Vertices with an arc from vertex."""
+    return [arc.output for arc in vertex.outputs if arc.output is not None]
     
 #############################################################################
 #############################################################################
@@ -38,6 +49,14 @@ class Vertex(trellis.Component, circuit.Switch):
     """Has a set of input Arcs and a set of output Arcs."""
     
     Event = Event
+    
+    # creation order, the same in every process that builds the same network
+    created = None
+    _created = itertools.count()
+    
+    def __init__(self, *args, **kwargs):
+        self.created = next(Vertex._created)
+        super(Vertex, self).__init__(*args, **kwargs)
 
     @trellis.maintain(make=sets.Set)
     def inputs(self):
@@ -62,6 +81,9 @@ class Vertex(trellis.Component, circuit.Switch):
 
 class Condition(Vertex):
     r"""Simple condition that either has some marking or has no marking."""
+    
+    # True if the marking is always an integer count
+    counted = False
 
     marking = trellis.attr(None)
 
@@ -73,6 +95,14 @@ class Condition(Vertex):
     def next(self):
         if self.marking:
             yield self.Event(self.send)
+    
+    def snapshot(self):
+        r"""Returns a hashable copy of the marking."""
+        return self.marking
+    
+    @trellis.modifier
+    def restore(self, snapshot):
+        self.marking = snapshot
 
 #############################################################################
 #############################################################################
@@ -86,6 +116,10 @@ class Transition(Vertex):
     Demultiplexer = operators.Tee
     Pipe = operators.Pipe
     
+    # Set of enabled transitions to keep this transition's membership in,
+    # assigned by the network outside of the rule graph
+    index = None
+    
     @trellis.maintain(make=lambda self: self.Multiplexer())
     def mux(self):
         mux = self.mux
@@ -113,24 +147,88 @@ class Transition(Vertex):
             pipe.output = self.demux
         return pipe
 
-    def next(self, *args, **kwargs):
+    def bindings(self, *args, **kwargs):
+        r"""Inputs to send, without wrapping them in events."""
         fn = self.pass_in(self.demux)
+        return fn(*args, **kwargs)
+    
+    def next(self, *args, **kwargs):
         Event = self.Event
         send = self.send
-        for input in fn(*args, **kwargs):
+        for input in self.bindings(*args, **kwargs):
             yield Event(send, input)
   
+    @trellis.maintain
+    def compiled(self):
+        # one function for the send chain, rebuilt when any part changes
+        send = operators.compile(self.demux, None)
+        send = operators.compile(self.pipe, send)
+        return operators.compile(self.mux, send)
+    
+    @trellis.modifier
     def send(self, *args, **kwargs):
-        fn = self.pass_out(self.mux)
-        return fn(*args, **kwargs)
+        return self.compiled(*args, **kwargs)
     
     # shortcut for executing the first default event
     def __call__(self, *args, **kwargs):
-        for event in self.next(*args, **kwargs):
+        for input in self.bindings(*args, **kwargs):
             break
         else: # no events
             raise StopIteration
-        return event()
+        return self.send(input)
+    
+    @trellis.compute
+    def enabled(self):
+        # only recomputed when a marking that was read changes;
+        # an unlinked chain (circuit.nada) has no bindings
+        for input in self.bindings() or ():
+            return True
+        return False
+    
+    @trellis.maintain(initially=False)
+    def indexed(self):
+        # The network adds or removes this transition when it assigns
+        # the index, according to this value
+        enabled = self.enabled
+        index = self.index
+        if index is not None and enabled != self.indexed:
+            if enabled:
+                index.add(self)
+            else:
+                index.discard(self)
+        return enabled
+
+#############################################################################
+#############################################################################
+
+class Marking(object):
+    r"""Compact, hashable record of the markings of a network.
+    
+    Counted markings are packed into an array,
+    the remaining condition snapshots are kept in a tuple.
+    Only markings of the same network are comparable.
+    """
+    
+    __slots__ = ('layout', 'counts', 'contents', '_hash',)
+    
+    def __init__(self, layout, counts, contents):
+        self.layout = layout
+        self.counts = counts
+        self.contents = contents
+        self._hash = None
+    
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash((self.counts.tostring(), self.contents))
+        return self._hash
+    
+    def __eq__(self, other):
+        if not isinstance(other, Marking):
+            return False
+        return self.counts == other.counts and self.contents == other.contents
+    
+    def __ne__(self, other):
+        return not self == other
 
 #############################################################################
 #############################################################################
@@ -157,20 +255,153 @@ class Network(trellis.Component):
 
     transitions = trellis.make(sets.Set)
     conditions = trellis.make(sets.Set)
+    
+    # Transitions with at least one default event
+    enabled = trellis.make(sets.Set)
+    
+    @trellis.maintain(initially=None)
+    def _index(self):
+        # O(changes), unless the transitions are cleared.
+        # Transition.index is a plain attribute, so that assigning it
+        # does not make the enabled Set depend on this rule.
+        index = self.enabled
+        transitions = self.transitions
+        members = self._index
+        if members is None:
+            members = set()
+            changed = None
+        else:
+            changed = sets.delta(transitions.changes)
+        if changed is None:
+            # diff against the previous members
+            current = set(transitions)
+            changed = (current - members, members - current)
+        added, removed = changed
+        actions = []
+        for t in added:
+            if t.index is not index:
+                actions.append((setattr, (t, 'index', t.index)))
+                t.index = index
+                if t.indexed:
+                    index.add(t)
+            if t not in members:
+                actions.append((members.discard, (t,)))
+                members.add(t)
+        for t in removed:
+            if t.index is index:
+                actions.append((setattr, (t, 'index', index)))
+                t.index = None
+                if t.indexed:
+                    index.discard(t)
+            if t in members:
+                actions.append((members.add, (t,)))
+                members.discard(t)
+        if actions:
+            trellis.on_undo(trellis.undo_all, actions)
+            trellis.mark_dirty()
+        return members
+
+    @trellis.maintain
+    def _layout(self):
+        # new key whenever the conditions change
+        self.conditions.changes
+        return object()
+    
+    def layout(self):
+        r"""Counted conditions, and the remaining conditions, in a fixed order."""
+        key = self._layout
+        cached = getattr(self, '_layouts', None)
+        if cached is None or cached[0] is not key:
+            conditions = tuple(self.conditions)
+            layout = (tuple([c for c in conditions if c.counted]),
+                      tuple([c for c in conditions if not c.counted]),)
+            cached = self._layouts = (key, layout)
+        return cached[1]
+    
+    def snapshot_marking(self, interned=None):
+        r"""Returns a Marking of the conditions.
+        
+        interned, if given, is a dict kept for as long as the caller
+        keeps markings (e.g. for one exploration), so that equal
+        condition snapshots are only stored once.
+        """
+        counted, others = layout = self.layout()
+        counts = array.array('l', [c.marking for c in counted])
+        if interned is None:
+            contents = [c.snapshot() for c in others]
+        else:
+            intern = interned.setdefault
+            contents = []
+            for c in others:
+                snapshot = c.snapshot()
+                contents.append(intern(snapshot, snapshot))
+        return Marking(layout, counts, tuple(contents))
+    
+    @trellis.modifier
+    def restore_marking(self, marking):
+        counted, others = marking.layout
+        for c, count in zip(counted, marking.counts):
+            if c.marking != count:
+                c.marking = count
+        for c, snapshot in zip(others, marking.contents):
+            if c.snapshot() != snapshot:
+                c.restore(snapshot)
+
+    def candidates(self, transitions=iter, *args, **kwargs):
+        # The index only tracks events enabled without arguments,
+        # and is only current outside of a modifier
+        if args or kwargs:
+            candidates = self.transitions
+        else:
+            candidates = self.enabled
+        return transitions(candidates)
 
     def next(self, transitions=iter, *args, **kwargs):
-        transitions = transitions(self.transitions)
-        for t in transitions:
+        # events may be fired between yields, committing changes to the index
+        snapshot = lambda candidates: transitions(tuple(candidates))
+        for t in self.candidates(snapshot, *args, **kwargs):
             for event in t.next(*args, **kwargs):
                 yield event
     
     @trellis.modifier
-    def __call__(self, *args, **kwargs):
-        for event in self.next(*args, **kwargs):
-            break
-        else:
-            raise StopIteration
-        return event()
+    def __call__(self, transitions=iter, *args, **kwargs):
+        # only the chosen binding is sent, and no events are built
+        for t in self.candidates(transitions, *args, **kwargs):
+            for input in t.bindings(*args, **kwargs):
+                return t.send(input)
+        raise StopIteration
+    
+    @trellis.modifier
+    def step(self, max_events=None, policy=iter, *args, **kwargs):
+        r"""Fires a maximal set of non-conflicting events in one transaction.
+        
+        Transitions conflict if they share an input or output condition,
+        so that no event consumes what another event of the step produces,
+        and no two events add to the same (possibly bounded) condition.
+        policy orders the enabled transitions, so earlier transitions
+        win conflicts.  Returns the fired events.
+        """
+        events = []
+        if max_events is not None and max_events < 1:
+            return events
+        claimed = set()
+        for t in self.candidates(policy, *args, **kwargs):
+            touched = [arc.input for arc in t.inputs]
+            touched.extend([arc.output for arc in t.outputs])
+            if not claimed.isdisjoint(touched):
+                continue
+            for input in t.bindings(*args, **kwargs):
+                break
+            else:
+                continue
+            claimed.update(touched)
+            events.append(t.Event(t.send, input))
+            if len(events) == max_events:
+                break
+        # all events were chosen against the same marking
+        for event in events:
+            event()
+        return events
 
 #############################################################################
 #############################################################################
@@ -15,26 +15,45 @@ from . import circuit
 #############################################################################
 
 def flatten(arg, filter=None, types=(list, tuple,)):
+    """Iterates over the leaves of nested types in arg.
+    
+    By default, leaves are anything that is not one of types.
+    Items that are neither leaves nor one of types are dropped.
+    """
+    if filter is None:
+        if not isinstance(arg, types):
+            return iter((arg,))
+    elif filter(arg):
+        return iter((arg,))
+    return iflatten(arg, filter, types)
+
+def iflatten(iterable, filter=None, types=(list, tuple,)):
+    """Lazily flattens the items of any iterable, as flatten."""
     if filter is None:
+        if isinstance(iterable, types) and \
+          not any(itertools.imap(isinstance, iterable, itertools.repeat(types))):
+            # shallow, so the scan above is the only pass in Python
+            return iter(iterable)
         filter = lambda x: not isinstance(x, types)
-    if filter(arg):
-        yield arg
-        return
-    iterable = iter(arg)
-    while True:
-        try:
-            i = iterable.next()
-        except StopIteration:
-            return
-        if filter(i):
-            yield i
-        elif isinstance(i, types):
-            try:
-                i = iter(i)
-            except TypeError:
-                pass
-            else:
-                iterable = itertools.chain(i, iterable)
+    return _flatten(iterable, filter, types)
+
+def _flatten(iterable, filter, types):
+    # explicit stack of iterators, one per level of nesting
+    stack = [iter(iterable)]
+    while stack:
+        for i in stack[-1]:
+            if filter(i):
+                yield i
+            elif isinstance(i, types):
+                try:
+                    i = iter(i)
+                except TypeError:
+                    pass
+                else:
+                    stack.append(i)
+                    break
+        else:
+            stack.pop()
                 
 #############################################################################
 #############################################################################
@@ -60,6 +79,89 @@ def brute(itr):
     for combo in recursor(itr):
         yield combo
 
+def backtrack(itr, prune=None, required=False):
+    """Lazy search of combinations of at most one item per input.
+    
+    Combinations are yielded in the same order as brute,
+    and each input is only iterated when the search first reaches it.
+    If required, every input contributes exactly one item,
+    combinations are yielded in the order of itertools.product,
+    and the search stops as soon as some input is empty.
+    If prune(combo) is true for a partial combination,
+    neither it nor any of its extensions are yielded.
+    """
+    if required:
+        return search_product(itr, prune)
+    return search_combinations(itr, prune)
+
+def search_combinations(itr, prune=None):
+    # brute, with pruning of the combinations of the remaining inputs
+    def recursor(itr):
+        for items in itr:
+            break
+        else:
+            return
+        items = [i for i in items]
+        for item in items:
+            combo = [item]
+            if prune is None or not prune(combo):
+                yield combo
+        for rest in recursor(itr):
+            yield rest
+            for item in items:
+                combo = [item] + rest
+                if prune is None or not prune(combo):
+                    yield combo
+    return recursor(itr)
+
+def search_product(itr, prune=None):
+    choices = []
+    combo = []
+    # set when some input is empty
+    empty = []
+    def recursor(i):
+        if i == len(choices):
+            for items in itr:
+                choices.append([item for item in items])
+                break
+            else:
+                yield list(combo)
+                return
+        items = choices[i]
+        if not items:
+            empty.append(i)
+            return
+        for item in items:
+            if empty:
+                return
+            combo.append(item)
+            if prune is None or not prune(combo):
+                for c in recursor(i + 1):
+                    yield c
+            combo.pop()
+    return recursor(0)
+
+def product(itr, prune=None):
+    """Search of combinations of exactly one item from every input."""
+    return backtrack(itr, prune=prune, required=True)
+
+#############################################################################
+#############################################################################
+
+def compile(component, output):
+    """Returns a function equivalent to component.send, given the
+    compiled send of its output.
+    
+    Components whose send is overridden below their compile
+    are not compiled, and their send is returned instead.
+    """
+    for cls in type(component).__mro__:
+        if 'compile' in cls.__dict__:
+            return component.compile(output)
+        if 'send' in cls.__dict__:
+            break
+    return component.send
+
 #############################################################################
 #############################################################################
 
@@ -76,6 +178,9 @@ class Pipe(trellis.Component, circuit.Pipe):
     def next(self):
         return self.pass_in(self.input)
     
+    def compile(self, output):
+        return output
+    
     
 class Call(Pipe):
     """Pipe operator that calls an input zero-argument function."""
@@ -84,6 +189,11 @@ class Call(Pipe):
     def send(self, thunk, *args, **kwargs):
         output = thunk()
         super(Call, self).send(output, *args, **kwargs)
+    
+    def compile(self, output):
+        def send(thunk, *args, **kwargs):
+            output(thunk(), *args, **kwargs)
+        return send
         
 class Iter(Pipe):
     """Pipe operator that iterates over input."""
@@ -92,6 +202,12 @@ class Iter(Pipe):
     def send(self, inputs, *args, **kwargs):
         for input in inputs:
             super(Iter, self).send(input, *args, **kwargs)
+    
+    def compile(self, output):
+        def send(inputs, *args, **kwargs):
+            for input in inputs:
+                output(input, *args, **kwargs)
+        return send
 
 class Apply(Pipe):
     """Pipe operator that applies a function to input."""
@@ -102,6 +218,12 @@ class Apply(Pipe):
     def send(self, *args, **kwargs):
         output = self.fn(*args, **kwargs)
         super(Apply, self).send(output)
+    
+    def compile(self, output):
+        fn = self.fn
+        def send(*args, **kwargs):
+            output(fn(*args, **kwargs))
+        return send
         
 class Flatten(Pipe):
     """Pipe operator that flattens input."""
@@ -112,6 +234,14 @@ class Flatten(Pipe):
             super(Flatten, self).send(**input)
         else:
             super(Flatten, self).send(*input)
+    
+    def compile(self, output):
+        def send(input):
+            if isinstance(input, collections.Mapping):
+                output(**input)
+            else:
+                output(*input)
+        return send
         
 class FilterIn(Pipe):
     """Pipe operator that applies a filter to input."""
@@ -134,6 +264,13 @@ class FilterOut(Pipe):
         filter = self.fn
         for output in filter(input):
             super(FilterOut, self).send(output, *args, **kwargs)
+    
+    def compile(self, output):
+        filter = self.fn
+        def send(input, *args, **kwargs):
+            for filtered in filter(input):
+                output(filtered, *args, **kwargs)
+        return send
 
 #############################################################################
 #############################################################################
@@ -164,9 +301,9 @@ class Pipeline(Pipe, collections.Iterable,):
         next = self.head
         while next is not None:
             yield next
-            next = next.output
             if next is self.tail:
                 break
+            next = next.output
         
     @trellis.modifier
     def append(self, item):
@@ -197,6 +334,11 @@ class Pipeline(Pipe, collections.Iterable,):
     def send(self):
         output = self.head if self.head is not None else self.output
         return self.pass_out(output)
+    
+    def compile(self, output):
+        for pipe in reversed(list(self)):
+            output = compile(pipe, output)
+        return output
         
     @trellis.compute
     def next(self):
@@ -214,16 +356,34 @@ class Multiplexer(trellis.Component, circuit.Multiplexer):
     @trellis.compute
     def send(self):
         return self.pass_out(self.output)
+    
+    def compile(self, output):
+        return output
 
 
 class Combinator(Multiplexer):
     """Iterates over all combinations of inputs."""
+    
+    # Partial combinations for which prune is true are not extended
+    prune = trellis.attr(None)
+    # If true, every input must contribute to a combination
+    required = trellis.attr(False)
+    
+    @trellis.compute
+    def search(self):
+        prune = self.prune
+        required = self.required
+        def search(itr):
+            return backtrack(itr, prune=prune, required=required)
+        return search
 
-    def next(self, search=brute, inputs=iter, *args, **kwargs):
-        # A brute-force, general approach is to yield all combinations
+    def next(self, search=None, inputs=iter, *args, **kwargs):
+        # By default, lazily yield all combinations
         # (n choose k for k in 1..n) of enabling events from all inputs.
         # We don't care about ordering (why we don't do permutations),
         # and there is no repetition.
+        if search is None:
+            search = self.search
         inputs = inputs(self.inputs)
         inputs_itr = itertools.imap(lambda x: x.next(*args, **kwargs), inputs)            
         for events in search(inputs_itr):
@@ -253,6 +413,14 @@ class Tee(Demultiplexer):
         outputs = outputs(self.outputs)
         for output in outputs:
             output.send(input, *args, **kwargs)
+    
+    def compile(self, output=None):
+        sends = tuple([compile(arc, arc.pass_out(arc.output))
+                       for arc in self.outputs or ()])
+        def send(input, *args, **kwargs):
+            for fn in sends:
+                fn(input, *args, **kwargs)
+        return send
         
 #############################################################################
 #############################################################################
@@ -0,0 +1,220 @@
+# @copyright
+# @license
+
+r"""Discrete event simulation of timed transitions.
+
+Every transition has a distribution of firing delays.
+When a transition becomes enabled, its firing is scheduled after a
+sampled delay, and the scheduled firing is cancelled if the transition
+is disabled first.
+After each firing, only the transitions that share a condition with
+the fired transition are rescheduled (the next reaction method).
+"""
+
+from __future__ import absolute_import
+
+import heapq
+import itertools
+import random
+
+from . import trellis
+from . import net
+
+#############################################################################
+#############################################################################
+
+class Exponential(object):
+
+    def __init__(self, rate):
+        self.rate = rate
+
+    def __call__(self, random):
+        return random.expovariate(self.rate)
+
+class Deterministic(object):
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def __call__(self, random):
+        return self.delay
+
+class Empirical(object):
+    r"""Resamples observed delays."""
+
+    def __init__(self, samples):
+        self.samples = tuple(samples)
+
+    def __call__(self, random):
+        return random.choice(self.samples)
+
+#############################################################################
+#############################################################################
+
+def level(condition):
+    r"""Number of tokens in a condition."""
+    if condition.counted:
+        return condition.marking
+    try:
+        return len(condition)
+    except TypeError:
+        return 1 if condition.marking else 0
+
+class Statistics(object):
+    r"""Time-weighted level of a condition."""
+
+    def __init__(self, level=0, time=0.0):
+        self.start = time
+        self.time = time
+        self.level = level
+        self.area = 0.0
+        self.busy = 0.0
+
+    def update(self, time, level):
+        elapsed = time - self.time
+        self.area += elapsed * self.level
+        if self.level:
+            self.busy += elapsed
+        self.time = time
+        self.level = level
+
+    def mean(self, time=None):
+        if time is None:
+            time = self.time
+        self.update(time, self.level)
+        elapsed = time - self.start
+        return self.area / elapsed if elapsed else float(self.level)
+
+    def utilisation(self, time=None):
+        if time is None:
+            time = self.time
+        self.update(time, self.level)
+        elapsed = time - self.start
+        return self.busy / elapsed if elapsed else float(bool(self.level))
+
+#############################################################################
+#############################################################################
+
+@trellis.modifier
+def fire(event):
+    return event()
+
+class Simulator(object):
+    r"""Races the enabled transitions of a network.
+
+    delays maps transitions to distributions, and default is used for
+    the rest.  observe, if given, is called with the time, transition and
+    event of every firing.
+    """
+
+    def __init__(self, network=None, transitions=None, delays=None,
+                 default=None, seed=None, choose=None, observe=None):
+        if transitions is None:
+            transitions = network.transitions
+        self.transitions = tuple(transitions)
+        self.delays = dict(delays or {})
+        self.default = Exponential(1.0) if default is None else default
+        self.random = random.Random(seed)
+        self.choose = choose
+        self.observe = observe
+        self.time = 0.0
+        self.heap = []
+        self.scheduled = {}
+        self.counter = itertools.count()
+        self.firings = dict([(t, 0) for t in self.transitions])
+
+        members = set(self.transitions)
+        self.touches = {}
+        self.affects = {}
+        conditions = set()
+        for t in self.transitions:
+            touched = set(net.preset(t) + net.postset(t))
+            conditions.update(touched)
+            self.touches[t] = tuple(touched)
+            affected = set()
+            for c in touched:
+                affected.update([u for u in net.preset(c) + net.postset(c) if u in members])
+            self.affects[t] = tuple(affected)
+        self.statistics = dict([(c, Statistics(level(c))) for c in conditions])
+
+        for t in self.transitions:
+            self.update(t)
+
+    def update(self, transition):
+        enabled = transition.enabled
+        scheduled = transition in self.scheduled
+        if enabled and not scheduled:
+            delay = self.delays.get(transition, self.default)(self.random)
+            entry = (self.time + delay, self.counter.next(), transition)
+            self.scheduled[transition] = entry
+            heapq.heappush(self.heap, entry)
+        elif scheduled and not enabled:
+            # left in the heap until it surfaces
+            del self.scheduled[transition]
+
+    def peek(self):
+        r"""Returns the time of the next firing, or None."""
+        heap = self.heap
+        scheduled = self.scheduled
+        while heap and scheduled.get(heap[0][2]) is not heap[0]:
+            heapq.heappop(heap)
+        if heap:
+            return heap[0][0]
+        return None
+
+    def step(self):
+        r"""Fires the next scheduled transition, returning it or None."""
+        if self.peek() is None:
+            return None
+        time, count, transition = heapq.heappop(self.heap)
+        del self.scheduled[transition]
+        self.time = time
+        if self.choose is None:
+            for input in transition.bindings():
+                break
+            event = transition.Event(transition.send, input)
+        else:
+            event = self.choose(list(transition.next()))
+        fire(event)
+        self.firings[transition] += 1
+        for c in self.touches[transition]:
+            self.statistics[c].update(time, level(c))
+        for t in self.affects[transition]:
+            self.update(t)
+        if self.observe is not None:
+            self.observe(time, transition, event)
+        return transition
+
+    def run(self, until=None, events=None):
+        r"""Fires until the given time or number of events, or a deadlock.
+
+        Returns the number of firings.
+        """
+        n = 0
+        while events is None or n < events:
+            time = self.peek()
+            if time is None or (until is not None and time > until):
+                break
+            self.step()
+            n += 1
+        if until is not None and self.time < until:
+            self.time = until
+        return n
+
+    def throughput(self):
+        r"""Firings per unit time of each transition."""
+        time = self.time
+        return dict([(t, n / time if time else 0.0) for t, n in self.firings.iteritems()])
+
+    def utilisation(self):
+        r"""Fraction of time that each condition was marked."""
+        time = self.time
+        return dict([(c, s.utilisation(time)) for c, s in self.statistics.iteritems()])
+
+    def mean(self):
+        r"""Time-averaged number of tokens in each condition."""
+        time = self.time
+        return dict([(c, s.mean(time)) for c, s in self.statistics.iteritems()])
+
+#############################################################################
+#############################################################################
@@ -1,6 +1,16 @@
-
 # To suppress Deprecataion Warnings
 
 import warnings
 warnings.simplefilter("ignore", DeprecationWarning)
 from peak.events.trellis import *
+
+#############################################################################
+#############################################################################
+
+def undo_all(actions):
+    r"""Undoes (fn, args) actions, last first."""
+    for fn, args in reversed(actions):
+        fn(*args)
+
+#############################################################################
+#############################################################################
@@ -0,0 +1,78 @@
+# @copyright
+# @license
+
+import unittest
+
+from pypetri.collections import allocation, flow
+
+#############################################################################
+#############################################################################
+
+class TestCaseAllocation(unittest.TestCase):
+    
+    def test_policies(self):
+        capacities = [1, None, 3, None]
+        self.assertEqual(allocation.greedy(10, capacities), [1, 9, 0, 0])
+        self.assertEqual(allocation.waterfill(10, capacities), [1, 3, 3, 3])
+        self.assertEqual(allocation.proportional(10, [1, 4, 5]), [1, 4, 5])
+        self.assertEqual(allocation.proportional(5, [2, 4, 4]), [1, 2, 2])
+        self.assertEqual(allocation.proportional(10, [1, 2]), [1, 2])
+        
+        outputs = ['a', 'b', 'c']
+        policy = allocation.prioritized(outputs.index)
+        self.assertEqual(policy(5, [None] * 3, outputs[::-1]), [0, 0, 5])
+        policy = allocation.weighted({'a': 1, 'b': 3, 'c': 0}.get)
+        self.assertEqual(policy(8, [None, 4, None], outputs), [4, 4, 0])
+    
+    def test_send(self):
+        network = flow.Network()
+        source = network.Condition(marking=6)
+        t = network.Transition()
+        outputs = [network.Condition(maximum=4), network.Condition(marking=1, minimum=1), network.Condition()]
+        network.Arc(source, t)
+        for c in outputs:
+            network.Arc(t, c)
+        t.demux.assigner = allocation.waterfill
+        
+        t()
+        # the tokens are spread evenly up to the maximums
+        self.assertEqual([c.marking for c in outputs], [2, 3, 2])
+    
+    def test_default(self):
+        # the split doesn't depend on the iteration order of the outputs
+        network = flow.Network()
+        source = network.Condition(marking=5)
+        t = network.Transition()
+        outputs = [network.Condition() for i in xrange(3)]
+        network.Arc(source, t)
+        arcs = [network.Arc(t, c) for c in outputs]
+        self.assertEqual(allocation.waterfill(5, [None] * 3, arcs), [2, 2, 1])
+        self.assertEqual(allocation.waterfill(5, [None] * 3, arcs[::-1]), [1, 2, 2])
+        
+        t()
+        self.assertEqual([c.marking for c in outputs], [2, 2, 1])
+    
+    def test_maxflow(self):
+        network = flow.Network()
+        source = network.Condition(marking=4)
+        t = network.Transition()
+        outputs = [network.Condition(), network.Condition()]
+        network.Arc(source, t)
+        for c in outputs:
+            network.Arc(t, c)
+        # the first output drains through a bottleneck
+        bottleneck = network.Condition(maximum=1)
+        u = network.Transition()
+        network.Arc(outputs[0], u)
+        network.Arc(u, bottleneck)
+        
+        policy = allocation.MaxFlow(network)
+        self.assertEqual(policy.throughput(outputs[0]), 1)
+        t.demux.assigner = policy
+        t()
+        counts = dict([(c, c.marking) for c in outputs])
+        self.assertEqual(counts[outputs[0]], 1)
+        self.assertEqual(counts[outputs[1]], 3)
+
+#############################################################################
+#############################################################################
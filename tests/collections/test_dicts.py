@@ -0,0 +1,59 @@
+# @copyright
+# @license
+
+import unittest
+
+from pypetri import trellis
+from pypetri.collections import dicts, sets
+
+#############################################################################
+#############################################################################
+
+class TestCaseDicts(unittest.TestCase):
+    
+    def test_dict(self):
+        d = dicts.Dict(a=1, b=2)
+        self.assertEqual(dict(d.iteritems()), {'a': 1, 'b': 2})
+        d['c'] = 3
+        del d['a']
+        self.assertEqual(dict(d.iteritems()), {'b': 2, 'c': 3})
+        self.assertEqual(d.pop('b'), 2)
+        self.assertEqual(d.keys(), ['c'])
+        d.clear()
+        self.assertEqual(len(d), 0)
+    
+    def test_copy(self):
+        for data, copy, change in ((dicts.Dict(a=1), dict(a=1), lambda d: d.update(b=2)),
+                                   (sets.Set(['a']), set(['a']), lambda s: s.add('b')),):
+            # copies are independent
+            copied = data.copy()
+            change(copied)
+            self.assertEqual(len(data), 1)
+            
+            shared = data._share()
+            change(data)
+            self.assertEqual(shared, copy)
+            self.assertEqual(len(data), 2)
+            
+            @trellis.modifier
+            def drain():
+                shared = data._share()
+                data.clear()
+                return shared
+            shared = drain()
+            self.assertEqual(len(shared), 2)
+            self.assertEqual(len(data), 0)
+            
+            # an empty shared value isn't changed by a clear and refill
+            @trellis.modifier
+            def refill():
+                shared = data._share()
+                data.clear()
+                change(data)
+                return shared
+            shared = refill()
+            self.assertEqual(len(shared), 0)
+            self.assertEqual(len(data), 1)
+
+#############################################################################
+#############################################################################
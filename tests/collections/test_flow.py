@@ -22,6 +22,59 @@ class TestCaseFlow(test_net.TestCaseNet):
     
     def initialize(self, conditions):
         conditions[0].marking = 1
+    
+    def test_step_bounded(self):
+        # both transitions fit the sink alone, but not together
+        network = self.Network()
+        sink = network.Condition(maximum=1)
+        for i in xrange(2):
+            source = network.Condition(marking=1)
+            t = network.Transition()
+            network.Arc(source, t)
+            network.Arc(t, sink)
+        events = network.step()
+        self.assertEqual(len(events), 1)
+        self.assertEqual(sink.marking, 1)
+    
+    def test_prune(self):
+        network = self.Network()
+        t = network.Transition()
+        network.Arc(t, network.Condition(maximum=1))
+        self.assertTrue(t.demux.prune is not None)
+        self.assertTrue(t.mux.prune is t.demux.prune)
+        
+        # an arbitrary predicate may accept more than the maximum
+        t.demux.predicate = lambda count, minimum, maximum: count == 2
+        self.assertTrue(t.demux.prune is None)
+        self.assertTrue(t.mux.prune is None)
+    
+    def test_demand(self):
+        network = self.Network()
+        t = network.Transition()
+        outputs = [network.Condition(), network.Condition()]
+        for c in outputs:
+            network.Arc(t, c)
+        demux = t.demux
+        self.assertEqual((demux.minimum, demux.maximum), (0, None))
+        
+        outputs[0].maximum = 3
+        outputs[1].maximum = 2
+        self.assertEqual((demux.minimum, demux.maximum), (0, 5))
+        
+        # the marking is set before the minimum, which bounds it
+        outputs[1].marking = 1
+        outputs[1].minimum = 1
+        outputs[0].marking = 2
+        self.assertEqual((demux.minimum, demux.maximum), (0, 2))
+        
+        c = network.Condition(marking=2, minimum=2)
+        arc = network.Arc(t, c)
+        self.assertEqual((demux.minimum, demux.maximum), (0, None))
+        
+        # removed outputs leave the totals
+        t.outputs.discard(arc)
+        c.inputs.discard(arc)
+        self.assertEqual((demux.minimum, demux.maximum), (0, 2))
 
 #############################################################################
 #############################################################################
@@ -0,0 +1,58 @@
+# @copyright
+# @license
+
+import unittest
+
+from pypetri.collections import flow
+
+#############################################################################
+#############################################################################
+
+class TestCaseMatrix(unittest.TestCase):
+    
+    def build(self, network):
+        source = network.Condition(marking=2)
+        buffer = network.Condition(maximum=1)
+        sink = network.Condition()
+        conditions = (source, buffer, sink)
+        transitions = (network.Transition(), network.Transition())
+        for i, t in enumerate(transitions):
+            network.Arc(conditions[i], t)
+            network.Arc(t, conditions[i+1])
+        return conditions, transitions
+    
+    def test_run(self):
+        network = flow.Network()
+        conditions, transitions = self.build(network)
+        compiled = network.compile(conditions=conditions, transitions=transitions)
+        
+        self.assertEqual(compiled.enabled().tolist(), [True, False])
+        fired = compiled.run(10)
+        self.assertEqual(fired.tolist(), [2, 2])
+        self.assertEqual(compiled.marking.tolist(), [0, 0, 2])
+        self.assertEqual(compiled.enabled().tolist(), [False, False])
+        
+        self.assertEqual(conditions[0].marking, 2)
+        compiled.sync()
+        self.assertEqual([c.marking for c in conditions], [0, 0, 2])
+    
+    def test_raw(self):
+        network = flow.Network()
+        conditions, transitions = self.build(network)
+        
+        try:
+            with network.raw() as compiled:
+                compiled.run(1)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual([c.marking for c in conditions], [2, 0, 0])
+        
+        with network.raw() as compiled:
+            compiled.run(10)
+            self.assertEqual([c.marking for c in conditions], [2, 0, 0])
+        self.assertEqual([c.marking for c in conditions], [0, 0, 2])
+        self.assertEqual(len(network.enabled), 0)
+
+#############################################################################
+#############################################################################
@@ -0,0 +1,58 @@
+# @copyright
+# @license
+
+import collections
+import unittest
+
+from pypetri import trellis
+from pypetri.collections import queue
+
+#############################################################################
+#############################################################################
+
+class TestCaseQueue(unittest.TestCase):
+    
+    def test_undo(self):
+        for maxlen in (None, 0, 2, 4):
+            for items in ((), (1,), (1, 2, 3), (1, 2, 3, 4, 5)):
+                for extend in (queue.extend, queue.extendleft):
+                    data = collections.deque('abc', maxlen=maxlen)
+                    before = list(data)
+                    trellis.undo_all(extend(data, items))
+                    self.assertEqual(list(data), before)
+    
+    def test_ring(self):
+        for maxlen in (0, 1, 3):
+            expected = collections.deque(maxlen=maxlen)
+            ring = queue.RingBuffer(maxlen=maxlen)
+            for data in (expected, ring):
+                data.extend(range(5))
+                data.appendleft(-1)
+                data.rotate(2)
+                data.extendleft((7, 8))
+                if data:
+                    data.pop()
+                data.rotate(-1)
+            self.assertEqual(list(ring), list(expected))
+            for i in range(-len(ring), len(ring)):
+                self.assertEqual(ring[i], expected[i])
+        
+        self.assertRaises(ValueError, queue.RingBuffer)
+        self.assertRaises(IndexError, queue.RingBuffer(maxlen=1).popleft)
+
+    def test_batch(self):
+        q = queue.Queue(range(5))
+        q.popleft(2)
+        q.rotate(1)
+        q.extendleft((1, 2))
+        self.assertEqual(list(q), [2, 1, 4, 2, 3])
+        q.clear()
+        self.assertEqual(len(q), 0)
+        
+        q = queue.RingQueue(range(5), maxlen=3)
+        self.assertEqual(list(q), [2, 3, 4])
+        q.append(5)
+        self.assertEqual((q.head, q.tail), (3, 5))
+
+#############################################################################
+#############################################################################
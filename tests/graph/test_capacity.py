@@ -0,0 +1,72 @@
+# @copyright
+# @license
+
+import unittest
+
+from pypetri import maxflow
+from pypetri.collections import flow
+
+#############################################################################
+#############################################################################
+
+class TestCaseCapacity(unittest.TestCase):
+    
+    def build(self):
+        network = flow.Network()
+        source = network.Condition()
+        middle = [network.Condition(maximum=2), network.Condition(maximum=3)]
+        sink = network.Condition(maximum=4)
+        split = network.Transition()
+        join = network.Transition()
+        network.Arc(source, split)
+        for c in middle:
+            network.Arc(split, c)
+            network.Arc(c, join)
+        network.Arc(join, sink)
+        return network, source, middle, sink
+    
+    def test_throughput(self):
+        network, source, middle, sink = self.build()
+        analysis = network.capacity()
+        self.assertEqual(analysis.throughput(), 4)
+        self.assertEqual(analysis.bottleneck(), [sink])
+        
+        sink.maximum = None
+        analysis = network.capacity()
+        self.assertEqual(analysis.throughput(), 5)
+        self.assertEqual(set(analysis.bottleneck()), set(middle))
+        
+        middle[0].maximum = None
+        analysis = network.capacity()
+        self.assertEqual(analysis.throughput(), maxflow.INFINITE)
+        self.assertEqual(analysis.bottleneck(), [])
+    
+    def test_feasible(self):
+        network, source, middle, sink = self.build()
+        self.assertTrue(network.capacity().feasible())
+        for c, minimum in zip(middle, (2, 3)):
+            c.marking = minimum
+            c.minimum = minimum
+        self.assertFalse(network.capacity().feasible())
+        sink.maximum = 5
+        self.assertTrue(network.capacity().feasible())
+    
+    def test_reuse(self):
+        network, source, middle, sink = self.build()
+        graphed = network.capacity().graphed
+        self.assertTrue(network.capacity().graphed is graphed)
+        # the reused graph follows the network
+        c = network.Condition()
+        t = network.Transition()
+        network.Arc(c, t)
+        network.Arc(t, middle[0])
+        self.assertEqual(set(network.capacity().sources), set([id(source), id(c)]))
+        
+        # each analysis keeps the bounds it was built with
+        analysis = network.capacity()
+        sink.maximum = 1
+        self.assertEqual(analysis.throughput(), 4)
+        self.assertEqual(network.capacity().throughput(), 1)
+
+#############################################################################
+#############################################################################
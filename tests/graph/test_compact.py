@@ -0,0 +1,75 @@
+# @copyright
+# @license
+
+import unittest
+
+import pypetri.graph.graph as pgraph
+from pypetri.graph.compact import *
+
+#############################################################################
+#############################################################################
+
+class TestCase(unittest.TestCase):
+    
+    def test_edges(self):
+        g = MultiDiGraph(name='g')
+        g.add_node(3, role='condition')
+        g.add_edge(0, 3, key=10, weight=1)
+        g.add_edge(0, 3, key=11)
+        g.add_edge(3, 0)
+        self.assertEqual(g.order(), 2)
+        self.assertEqual(g.size(), 3)
+        self.assertEqual(g.node[3], {'role': 'condition'})
+        self.assertEqual(g.get_edge_data(0, 3), {10: {'weight': 1}, 11: {}})
+        self.assertTrue(g.has_edge(0, 3, 10))
+        self.assertFalse(g.has_edge(0, 3, 12))
+        self.assertEqual(g.in_degree(3), 2)
+        self.assertEqual(g.out_degree(3), 1)
+        
+        copy = g.copy()
+        g.remove_edge(0, 3, 10)
+        self.assertEqual(sorted(g.edges(keys=True)), [(0, 3, 11), (3, 0, 0)])
+        g.remove_node(3)
+        self.assertEqual((g.order(), g.size()), (1, 0))
+        self.assertEqual((copy.order(), copy.size()), (2, 3))
+        
+        # removed edges are reused
+        g.add_edge(1, 2, key=5)
+        self.assertEqual(g.edges(keys=True), [(1, 2, 5)])
+        self.assertEqual(len(g._tails), 3)
+        
+        offsets, heads, keys = copy.csr()
+        self.assertEqual(list(offsets), [0, 2, 2, 2, 3])
+        self.assertEqual(sorted(heads[0:2]), [3, 3])
+        
+        exported = copy.to_networkx()
+        self.assertEqual(exported.name, 'g')
+        self.assertEqual(sorted(exported.edges(keys=True)), 
+                         sorted(copy.edges(keys=True)))
+    
+    def test_remove_node(self):
+        g = MultiDiGraph()
+        g.add_edges_from([(0, 1), (1, 0), (0, 0), (2, 0), (0, 2), (0, 2), (1, 2), (2, 1)])
+        g.remove_node(0)
+        self.assertEqual(g.size(), 2)
+        self.assertEqual(sorted(g.edges()), [(1, 2), (2, 1)])
+        for u in (1, 2):
+            self.assertEqual((g.in_degree(u), g.out_degree(u)), (1, 1))
+    
+    def test_backend(self):
+        numbering = Numbering()
+        g = pgraph.Graph(graph=MultiDiGraph())
+        u, v = numbering('u'), numbering('v')
+        g.add_edge(u, v, key=1)
+        g.add_edge(u, v, key=2)
+        self.assertEqual(g.size(), 2)
+        self.assertEqual(numbering('u'), u)
+        snapshot = g.snapshot()
+        g.remove_node(u)
+        self.assertEqual(g.size(), 0)
+        self.assertEqual(snapshot.size(), 2)
+        # only the read-only attributes of the backend are forwarded
+        self.assertRaises(AttributeError, getattr, g, '_reset')
+
+#############################################################################
+#############################################################################
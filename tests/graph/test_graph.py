@@ -97,6 +97,44 @@ class TestCaseGraph(unittest.TestCase):
         listener.graph = None
         graph.clear()
         self.assertEqual(len(graph), 0)
+    
+    def test_bulk(self, N=4):
+        graph = pgraph.Graph(graph=pgraph.nx.MultiDiGraph())
+        graph.add_path(range(N))
+        self.assertEqual((len(graph), graph.size()), (N, N-1))
+        # only keyed edges are added in parallel
+        graph.add_edges_from([(0, 1), (0, 1, 7, {'weight': 1})])
+        self.assertEqual(graph.number_of_edges(0, 1), 2)
+        self.assertEqual(graph.get_edge_data(0, 1, 7), {'weight': 1})
+        graph.add_edge(0, 1)
+        self.assertEqual(graph.number_of_edges(0, 1), 2)
+        graph.remove_edges_from([(0, 1, 7)])
+        self.assertEqual(graph.number_of_edges(0, 1), 1)
+        graph.remove_nodes_from(range(N-1))
+        self.assertEqual((len(graph), graph.size()), (1, 0))
+
+#############################################################################
+#############################################################################
+
+class TestCaseSubscription(unittest.TestCase):
+    
+    def test_mirror(self):
+        graph = pgraph.Graph()
+        graph.add_nodes_from(range(3))
+        subscription = graph.subscribe(mirror=True)
+        self.assertEqual(subscription.poll(), [])
+        graph.add_edge(0, 1)
+        graph.remove_node(2)
+        changes = subscription.poll()
+        self.assertEqual([s for s, c in changes], [2, 3])
+        graph.clear()
+        graph.add_node(4)
+        mirrored = subscription.mirror()
+        self.assertEqual(mirrored.nodes(), [4])
+        self.assertEqual(len(graph._log), 0)
+        subscription.close()
+        graph.add_node(5)
+        self.assertEqual(len(graph._log), 0)
 
 #############################################################################
 #############################################################################
@@ -0,0 +1,54 @@
+# @copyright
+# @license
+
+import unittest
+
+from pypetri import net
+from pypetri.graph.net import NetworkGraph
+from pypetri.graph.internet import *
+
+#############################################################################
+#############################################################################
+
+class TestCase(unittest.TestCase):
+    
+    def test_boundary(self):
+        networks = [net.Network(), net.Network()]
+        condition = networks[0].Condition()
+        transition = networks[1].Transition()
+        subgraphs = [NetworkGraph(n, str) for n in networks]
+        names = [str(n) for n in networks]
+        arc = networks[0].Arc(condition, transition)
+        graphed = InternetworkGraph(tuple(subgraphs))
+        self.assertEqual(graphed.outgoing(names[0]), frozenset([arc]))
+        self.assertEqual(graphed.incoming(names[1]), frozenset([arc]))
+        self.assertEqual(graphed.incoming(names[0]), frozenset())
+        self.assertEqual(graphed.snapshot().size(), 1)
+        
+        # arcs within a subnet don't cross
+        internal = networks[0].Arc(condition, networks[0].Transition())
+        self.assertEqual(graphed.outgoing(names[0]), frozenset([arc]))
+        
+        # arcs to new vertices
+        returned = networks[1].Arc(transition, networks[0].Condition())
+        self.assertEqual(graphed.outgoing(names[1]), frozenset([returned]))
+        self.assertEqual(graphed.incoming(names[0]), frozenset([returned]))
+        self.assertEqual(graphed.snapshot().size(), 2)
+        
+        # removed arcs
+        arc.input.outputs.discard(arc)
+        arc.output.inputs.discard(arc)
+        self.assertEqual(graphed.outgoing(names[0]), frozenset())
+        self.assertEqual(graphed.incoming(names[1]), frozenset())
+        self.assertEqual(graphed.snapshot().size(), 1)
+        
+        # removed vertices leave their subnet, 
+        # but arcs from outside any subnet still cross
+        networks[1].transitions.discard(transition)
+        self.assertEqual(graphed.outgoing(names[1]), frozenset())
+        self.assertEqual(graphed.incoming(names[0]), frozenset([returned]))
+        self.assertEqual(graphed.snapshot().size(), 0)
+        self.assertFalse(internal in graphed.edges)
+
+#############################################################################
+#############################################################################
@@ -22,6 +22,32 @@ class TestCase(test_net.TestCaseNet):
         g = graphed.graph.snapshot()
         self.assertEqual(g.order(), 2*N-1)
         self.assertEqual(g.size(), 2*N-2)
+    
+    def test_incremental(self, N=2):
+        network = self.Network()
+        conditions, transitions, arcs = self.build_linear(network, N)
+        graphed = NetworkGraph(network, str)
+        
+        # new vertex and parallel arcs
+        condition = network.Condition()
+        arcs.append(network.Arc(transitions[-1], condition))
+        arcs.append(network.Arc(transitions[-1], condition))
+        g = graphed.graph.snapshot()
+        self.assertEqual(g.order(), 2*N)
+        self.assertEqual(g.size(), 2*N)
+        
+        # removed arc
+        arc = arcs.pop()
+        arc.input.outputs.discard(arc)
+        arc.output.inputs.discard(arc)
+        g = graphed.graph.snapshot()
+        self.assertEqual(g.size(), 2*N-1)
+        
+        # removed vertex
+        network.conditions.discard(condition)
+        g = graphed.graph.snapshot()
+        self.assertEqual(g.order(), 2*N-1)
+        self.assertEqual(g.size(), 2*N-2)
 
 #############################################################################
 #############################################################################
@@ -0,0 +1,46 @@
+# @copyright
+# @license
+
+import multiprocessing
+import os
+import unittest
+
+from pypetri.graph import parallel, reachability
+from pypetri.examples import traffic_lights
+
+#############################################################################
+#############################################################################
+
+def intersection(ways=2):
+    network = traffic_lights.Intersection(ways=ways)
+    conditions = [network.start]
+    transitions = []
+    for light in network.lights:
+        conditions.extend([getattr(light, name.lower()) for name in light.CONDITIONS])
+        transitions.extend([getattr(light, name.lower()) for name in light.TRANSITIONS])
+    return reachability.Explorer(network, conditions, transitions)
+
+def dies():
+    # exits the worker processes without reporting an error
+    if multiprocessing.current_process().name != 'MainProcess':
+        os._exit(1)
+    return intersection()
+
+#############################################################################
+#############################################################################
+
+class TestCase(unittest.TestCase):
+    
+    def test_intersection(self, ways=2, processes=2):
+        explored = parallel.explore(intersection, processes=processes, edges=True)
+        serial = intersection(ways).explore()
+        self.assertTrue(explored.complete)
+        self.assertEqual(set(explored.states), set(serial.states))
+        self.assertEqual(len(explored.edges), len(serial.edges))
+        self.assertEqual(len(explored.deadlocks), 0)
+    
+    def test_dead_worker(self, processes=2):
+        self.assertRaises(RuntimeError, parallel.explore, dies, processes=processes)
+
+#############################################################################
+#############################################################################
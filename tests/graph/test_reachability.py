@@ -0,0 +1,117 @@
+# @copyright
+# @license
+
+import unittest
+import itertools
+
+from pypetri.graph import reachability
+from pypetri.collections import flow
+from pypetri.examples import traffic_lights
+
+from .. import test_net
+
+#############################################################################
+#############################################################################
+
+class TestCase(unittest.TestCase):
+    
+    Network = test_net.TestCaseNet.Network
+    
+    def test_linear(self, N=3):
+        network = self.Network()
+        conditions, transitions, arcs = test_net.build_linear(network, N)
+        test_net.initialize(conditions)
+        initial = [c.marking for c in conditions]
+        
+        explored = reachability.Explorer(network).explore()
+        self.assertTrue(explored.complete)
+        self.assertEqual(len(explored), N)
+        self.assertEqual(len(explored.edges), N-1)
+        self.assertEqual(len(explored.deadlocks), 1)
+        self.assertEqual([c.marking for c in conditions], initial)
+        
+        g = explored.graph()
+        self.assertEqual(g.order(), N)
+        self.assertEqual(g.size(), N-1)
+    
+    def test_limit(self, N=3):
+        network = self.Network()
+        conditions, transitions, arcs = test_net.build_linear(network, N)
+        test_net.initialize(conditions)
+        
+        explored = reachability.Explorer(network, limit=N-1).explore()
+        self.assertFalse(explored.complete)
+        self.assertEqual(len(explored), N-1)
+
+    def test_reduce(self, N=3):
+        network = self.Network()
+        for i in xrange(2):
+            conditions, transitions, arcs = test_net.build_linear(network, N)
+            test_net.initialize(conditions)
+        conditions = tuple(network.conditions)
+        
+        full = reachability.Explorer(network, conditions).explore()
+        self.assertEqual(len(full), N*N)
+        reduced = reachability.Explorer(network, conditions, reduce=True).explore()
+        self.assertTrue(reduced.complete)
+        self.assertTrue(len(reduced) < len(full))
+        deadlocks = [[x.states[i] for i in x.deadlocks] for x in (full, reduced)]
+        self.assertEqual(len(deadlocks[0]), 1)
+        self.assertEqual(deadlocks[0], deadlocks[1])
+    
+    def test_reduce_optional(self):
+        # t fires with either input, but only b is ever produced
+        network = self.Network()
+        s, d, sb, a, b, e = [network.Condition() for i in xrange(6)]
+        x, pb, t = [network.Transition() for i in xrange(3)]
+        for pair in ((s, x), (x, d), (sb, pb), (pb, b), (a, t), (b, t), (t, e), (t, d)):
+            network.Arc(*pair)
+        s.marking = sb.marking = True
+        conditions = (s, d, sb, a, b, e)
+        transitions = (x, pb, t)
+        
+        explorer = reachability.Explorer(network, conditions, transitions, reduce=True)
+        self.assertTrue(1 in explorer.enablers(2))
+        full = reachability.Explorer(network, conditions, transitions).explore()
+        reduced = explorer.explore()
+        deadlocks = [set([x.states[i] for i in x.deadlocks]) for x in (full, reduced)]
+        self.assertEqual(deadlocks[0], deadlocks[1])
+
+#############################################################################
+#############################################################################
+
+class TestCaseTrafficLights(unittest.TestCase):
+    
+    def test_intersection(self, ways=2):
+        network = traffic_lights.Intersection(ways=ways)
+        conditions = itertools.chain(network.conditions,
+                                     *[light.conditions for light in network.lights])
+        transitions = itertools.chain(*[light.transitions for light in network.lights])
+        explored = reachability.Explorer(network, conditions, transitions).explore()
+        self.assertTrue(explored.complete)
+        # all red, or one light green or yellow
+        self.assertEqual(len(explored), 1 + 2*ways)
+        self.assertEqual(len(explored.deadlocks), 0)
+
+#############################################################################
+#############################################################################
+
+class TestCaseCoverability(unittest.TestCase):
+    
+    def test_unbounded(self):
+        network = flow.Network()
+        source = network.Condition(marking=1)
+        sink = network.Condition()
+        t = network.Transition()
+        network.Arc(source, t)
+        network.Arc(t, source)
+        network.Arc(t, sink)
+        compiled = network.compile(conditions=(source, sink), transitions=(t,))
+        
+        covered = reachability.Coverability(compiled).explore()
+        self.assertTrue(covered.complete)
+        self.assertEqual(covered.states, [(1, 0), (1, reachability.OMEGA)])
+        self.assertEqual(len(covered.deadlocks), 0)
+
+#############################################################################
+#############################################################################
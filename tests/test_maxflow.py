@@ -0,0 +1,38 @@
+# @copyright
+# @license
+
+import unittest
+
+from pypetri import maxflow
+
+#############################################################################
+#############################################################################
+
+class TestCaseMaxFlow(unittest.TestCase):
+    
+    def test_maximize(self):
+        graph = maxflow.Dinic(4)
+        edges = [graph.edge(0, 1, 3), graph.edge(0, 2, 2),
+                 graph.edge(1, 2, 1), graph.edge(1, 3, 2),
+                 graph.edge(2, 3, 3),]
+        self.assertEqual(graph.maximize(0, 3), 5)
+        self.assertEqual(sum([graph.initial[e] for e in graph.cut(0)]), 5)
+        self.assertEqual(sum([graph.flow(e) for e in edges[:2]]), 5)
+        
+        graph.reset()
+        self.assertEqual(graph.flow(edges[0]), 0)
+        self.assertEqual(graph.maximize(0, 3), 5)
+    
+    def test_unbounded(self):
+        graph = maxflow.Dinic(3)
+        graph.edge(0, 1)
+        graph.edge(1, 2)
+        self.assertEqual(graph.maximize(0, 2), maxflow.INFINITE)
+        
+        graph = maxflow.Dinic(3)
+        graph.edge(0, 1)
+        graph.edge(1, 2, 4)
+        self.assertEqual(graph.maximize(0, 2), 4)
+
+#############################################################################
+#############################################################################
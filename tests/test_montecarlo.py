@@ -0,0 +1,49 @@
+# @copyright
+# @license
+
+import unittest
+import random
+
+from pypetri import montecarlo
+
+from . import test_net
+
+#############################################################################
+#############################################################################
+
+def linear(N=3):
+    network = test_net.TestCaseNet.Network()
+    conditions, transitions, arcs = test_net.build_linear(network, N)
+    test_net.initialize(conditions)
+    return network
+
+#############################################################################
+#############################################################################
+
+class TestCase(unittest.TestCase):
+    
+    def test_seed(self):
+        self.assertEqual(montecarlo.seed(0, 1), montecarlo.seed(0, 1))
+        self.assertNotEqual(montecarlo.seed(0, 1), montecarlo.seed(0, 2))
+    
+    def test_shuffled(self, N=6):
+        # the same seed gives the same order for equal networks
+        orders = []
+        for i in xrange(2):
+            network = test_net.TestCaseNet.Network()
+            conditions, transitions, arcs = test_net.build_linear(network, N)
+            policy = montecarlo.shuffled(random.Random(0))
+            orders.append([transitions.index(t) for t in policy(network.transitions)])
+        self.assertEqual(orders[0], orders[1])
+    
+    def test_replications(self, N=3, replications=4):
+        runner = montecarlo.Replications(linear, max_workers=2)
+        indices = [index for index, result in runner(replications)]
+        self.assertEqual(sorted(indices), range(replications))
+        steps = runner.summaries['steps']
+        self.assertEqual(steps.n, replications)
+        self.assertEqual(steps.mean, N-1)
+        self.assertEqual(runner.intervals()['deadlock'], (1.0, 1.0))
+
+#############################################################################
+#############################################################################
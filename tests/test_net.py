@@ -9,6 +9,26 @@ from pypetri.net import *
 #############################################################################
 #############################################################################
 
+def build_linear(network, N=2):
+    r"""Chain of N conditions and N-1 transitions."""
+    conditions = [network.Condition() for i in xrange(N)]
+    transitions = [network.Transition() for i in xrange(N-1)]
+    arcs = []
+    for i in xrange(N):
+        if i > 0:
+            pair = transitions[i-1], conditions[i]
+            arcs.append(network.Arc(*pair))
+        if i < N-1:
+            pair = conditions[i], transitions[i]
+            arcs.append(network.Arc(*pair))
+    return conditions, transitions, arcs
+
+def initialize(conditions):
+    conditions[0].marking = True
+
+#############################################################################
+#############################################################################
+
 class TestCaseNet(unittest.TestCase):
     
     class Network(Network):
@@ -19,20 +39,10 @@ class TestCaseNet(unittest.TestCase):
             return super(TestCaseNet.Network, self).Transition(*args, **kwargs)
     
     def build_linear(self, network, N=2):
-        conditions = [network.Condition() for i in xrange(N)]
-        transitions = [network.Transition() for i in xrange(N-1)]
-        arcs = []
-        for i in xrange(N):
-            if i > 0:
-                pair = transitions[i-1], conditions[i]
-                arcs.append(network.Arc(*pair))
-            if i < N-1:
-                pair = conditions[i], transitions[i]
-                arcs.append(network.Arc(*pair))
-        return conditions, transitions, arcs
+        return build_linear(network, N)
     
     def initialize(self, conditions):
-        conditions[0].marking = True
+        initialize(conditions)
 
     def isdone(self, network):
         events = [e for e in network.next()]
@@ -59,6 +69,95 @@ class TestCaseNet(unittest.TestCase):
         self.isdone(network)
 
         return network
+    
+    def test_enabled(self, N=3):
+        network = self.Network()
+        conditions, transitions, arcs = self.build_linear(network, N)
+        self.assertEqual(len(network.enabled), 0)
+        
+        self.initialize(conditions)
+        
+        for i in xrange(N-1):
+            self.assertEqual(set(network.enabled), set([transitions[i]]))
+            network()
+        
+        self.assertEqual(len(network.enabled), 0)
+    
+    def test_enabled_clear(self, N=3):
+        network = self.Network()
+        conditions, transitions, arcs = self.build_linear(network, N)
+        self.initialize(conditions)
+        self.assertEqual(set(network.enabled), set([transitions[0]]))
+        
+        # cleared transitions leave the index, and can't be fired
+        network.transitions.clear()
+        self.assertEqual(len(network.enabled), 0)
+        self.assertRaises(StopIteration, network)
+        
+        network.transitions.update(transitions)
+        self.assertEqual(set(network.enabled), set([transitions[0]]))
+    
+    def test_marking(self, N=3):
+        network = self.Network()
+        conditions, transitions, arcs = self.build_linear(network, N)
+        self.initialize(conditions)
+        initial = [c.marking for c in conditions]
+        
+        marking = network.snapshot_marking()
+        self.assertEqual(marking, network.snapshot_marking())
+        self.assertEqual(hash(marking), hash(network.snapshot_marking()))
+        interned = {}
+        self.assertEqual(marking, network.snapshot_marking(interned))
+        network()
+        self.assertNotEqual(marking, network.snapshot_marking())
+        network.restore_marking(marking)
+        self.assertEqual(marking, network.snapshot_marking())
+        self.assertEqual([c.marking for c in conditions], initial)
+    
+    def test_step(self, N=3):
+        network = self.Network()
+        chains = [self.build_linear(network, N) for i in xrange(2)]
+        for conditions, transitions, arcs in chains:
+            self.initialize(conditions)
+        
+        events = network.step(max_events=1)
+        self.assertEqual(len(events), 1)
+        events = network.step()
+        self.assertEqual(len(events), 2)
+        events = network.step()
+        self.assertEqual(len(events), 1)
+        self.isdone(network)
+    
+    def test_step_chained(self, N=3):
+        # the second transition consumes what the first produces
+        network = self.Network()
+        conditions, transitions, arcs = self.build_linear(network, N)
+        self.initialize(conditions)
+        self.initialize(conditions[1:])
+        events = network.step()
+        self.assertEqual(len(events), 1)
+
+#############################################################################
+#############################################################################
+
+class TestCaseCompile(unittest.TestCase):
+    
+    def test_recompile(self):
+        network = TestCaseNet.Network()
+        source, sink = network.Condition(), network.Condition()
+        t = network.Transition()
+        network.Arc(source, t)
+        network.Arc(t, sink)
+        source.marking = True
+        t()
+        self.assertEqual((source.marking, sink.marking), (None, True))
+        
+        # adding an output replaces the compiled send
+        other = network.Condition()
+        network.Arc(t, other)
+        source.marking = True
+        t()
+        self.assertEqual(other.marking, True)
 
 #############################################################################
 #############################################################################
@@ -0,0 +1,96 @@
+# @copyright
+# @license
+
+import unittest
+
+from pypetri import operators
+
+#############################################################################
+#############################################################################
+
+class TestCaseFlatten(unittest.TestCase):
+    
+    def test_flatten(self):
+        self.assertEqual(list(operators.flatten(1)), [1])
+        self.assertEqual(list(operators.flatten([1, 2])), [1, 2])
+        nested = [1, [2, (3, [4, []]), 5], 6]
+        self.assertEqual(list(operators.flatten(nested)), range(1, 7))
+        self.assertEqual(list(operators.iflatten(iter(nested))), range(1, 7))
+        
+        ints = lambda x: isinstance(x, int)
+        self.assertEqual(list(operators.flatten([[1, 'a'], 2], filter=ints)), [1, 2])
+    
+    def test_deep(self, depth=10000):
+        nested = inner = []
+        for i in xrange(depth):
+            inner.append([i])
+            inner = inner[-1]
+        self.assertEqual(list(operators.flatten(nested)), range(depth))
+
+class TestCaseCompile(unittest.TestCase):
+    
+    def test_pipeline(self):
+        pipeline = operators.Pipeline(operators.Iter(), 
+                                      operators.Apply(fn=lambda x: x * 2),
+                                      operators.FilterIn(fn=None),)
+        self.assertEqual(len(list(pipeline)), 3)
+        outputs = []
+        send = operators.compile(pipeline, outputs.append)
+        send([1, 2, 3])
+        self.assertEqual(outputs, [2, 4, 6])
+    
+    def test_fallback(self):
+        
+        class Double(operators.Pipe):
+            def send(self, input):
+                super(Double, self).send(input * 2)
+        
+        pipe = Double()
+        self.assertEqual(operators.compile(pipe, None), pipe.send)
+
+#############################################################################
+#############################################################################
+
+class TestCaseSearch(unittest.TestCase):
+    
+    INPUTS = ((1, 2), (), (3,), (4, 5))
+    
+    def search(self, search, *args, **kwargs):
+        inputs = iter(self.INPUTS)
+        return [tuple(sorted(combo)) for combo in search(inputs, *args, **kwargs)]
+    
+    def test_backtrack(self):
+        combos = self.search(operators.backtrack)
+        self.assertEqual(len(combos), len(set(combos)))
+        self.assertEqual(set(combos), set(self.search(operators.brute)))
+    
+    def test_order(self):
+        # the first combination is what transitions fire by default
+        self.assertEqual(self.search(operators.backtrack), 
+                         self.search(operators.brute))
+    
+    def test_lazy(self):
+        pulled = []
+        def inputs():
+            for i in self.INPUTS:
+                pulled.append(i)
+                yield i
+        combos = operators.backtrack(inputs())
+        self.assertEqual(combos.next(), [1])
+        self.assertEqual(len(pulled), 1)
+    
+    def test_product(self):
+        combos = self.search(operators.product)
+        self.assertEqual(combos, [])
+        inputs = [i for i in self.INPUTS if i]
+        combos = [tuple(c) for c in operators.product(iter(inputs))]
+        self.assertEqual(combos, [(1, 3, 4), (1, 3, 5), (2, 3, 4), (2, 3, 5)])
+    
+    def test_prune(self, maximum=6):
+        prune = lambda combo: sum(combo) > maximum
+        combos = self.search(operators.backtrack, prune=prune)
+        expected = [c for c in self.search(operators.brute) if sum(c) <= maximum]
+        self.assertEqual(set(combos), set(expected))
+
+#############################################################################
+#############################################################################
@@ -0,0 +1,46 @@
+# @copyright
+# @license
+
+import unittest
+
+from pypetri import stochastic
+
+from . import test_net
+
+#############################################################################
+#############################################################################
+
+class TestCase(unittest.TestCase):
+    
+    Network = test_net.TestCaseNet.Network
+    
+    def test_deterministic(self, N=3, delay=1.0):
+        network = self.Network()
+        conditions, transitions, arcs = test_net.build_linear(network, N)
+        test_net.initialize(conditions)
+        
+        simulator = stochastic.Simulator(network, default=stochastic.Deterministic(delay))
+        self.assertEqual(simulator.run(), N-1)
+        self.assertEqual(simulator.time, (N-1)*delay)
+        self.assertTrue(conditions[-1].marking)
+        
+        for t in transitions:
+            self.assertEqual(simulator.firings[t], 1)
+        utilisation = simulator.utilisation()
+        for c in conditions[:-1]:
+            self.assertAlmostEqual(utilisation[c], 1.0 / (N-1))
+        self.assertEqual(utilisation[conditions[-1]], 0.0)
+    
+    def test_until(self, N=3):
+        network = self.Network()
+        conditions, transitions, arcs = test_net.build_linear(network, N)
+        test_net.initialize(conditions)
+        
+        simulator = stochastic.Simulator(network, seed=0)
+        simulator.run(until=0.0)
+        self.assertEqual(sum(simulator.firings.values()), 0)
+        self.assertEqual(simulator.run(events=1), 1)
+        self.assertTrue(simulator.time > 0.0)
+
+#############################################################################
+#############################################################################